@@ -0,0 +1,446 @@
+import argparse
+import asyncio
+import contextlib
+import gzip
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tarfile
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from aiohttp import web
+
+# a load test running the real dispatcher and modules offline, against a fake bot api server
+# and a scratch working directory, like 'python scripts/benchmark_load.py chat waifu'.
+
+SOURCE_PATH = Path(__file__).absolute().parents[1] / "src" / "yakusoku"
+
+BOT_ID = 1000000
+TOKEN = f"{BOT_ID}:benchmark"
+OWNER_ID = 1
+FIRST_USER_ID = 10000
+PKGS_DISTRO = "benchmark"
+
+CHAT_TEXTS = (
+    "早上好",
+    "有人吗",
+    "今天吃什么",
+    "hello everyone",
+    "哈哈哈哈哈哈",
+    "看看这个 https://example.com/posts/1",
+    "/摸摸 头",
+    "/rua",
+)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+group_ids = itertools.count(-1001000000000, -1)
+message_ids = itertools.count(1)
+
+
+def make_user(id: int) -> dict[str, Any]:
+    return {"id": id, "is_bot": False, "first_name": f"user{id}", "username": f"user{id}"}
+
+
+def make_chat(id: int) -> dict[str, Any]:
+    if id < 0:
+        return {"id": id, "type": "supergroup", "title": f"group{-id}"}
+    return {"id": id, "type": "private", "first_name": f"user{id}", "username": f"user{id}"}
+
+
+def make_message(chat: int, user: int, text: str) -> dict[str, Any]:
+    return {
+        "message": {
+            "message_id": next(message_ids),
+            "date": int(time.time()),
+            "chat": make_chat(chat),
+            "from": make_user(user),
+            "text": text,
+        }
+    }
+
+
+def build_apk_index(count: int) -> bytes:
+    lines: list[str] = []
+    for index in range(count):
+        lines += [f"P:pkg{index}", f"V:1.{index}.0-r0", "A:x86_64", f"T:package {index}", ""]
+    index_data = "\n".join(lines).encode()
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        info = tarfile.TarInfo("APKINDEX")
+        info.size = len(index_data)
+        tar.addfile(info, io.BytesIO(index_data))
+    return gzip.compress(archive.getvalue())
+
+
+class FakeBotApi:
+    packages: int
+    updates: list[dict[str, Any]]
+    calls: Counter[str]
+    sent: list[tuple[str, dict[str, str]]]
+    _update_ids: "itertools.count[int]"
+    _arrived: asyncio.Event
+    _apk_index: bytes | None
+    _runner: web.AppRunner | None
+
+    def __init__(self, packages: int) -> None:
+        self.packages = packages
+        self.updates = []
+        self.calls = Counter()
+        self.sent = []
+        self._update_ids = itertools.count(1)
+        self._arrived = asyncio.Event()
+        self._apk_index = None
+        self._runner = None
+
+    def push(self, *updates: dict[str, Any]) -> None:
+        for update in updates:
+            self.updates.append({"update_id": next(self._update_ids), **update})
+        self._arrived.set()
+
+    async def _get_updates(self, params: dict[str, str]) -> list[dict[str, Any]]:
+        # updates before the offset are confirmed, just like telegram does.
+        offset = int(params.get("offset", 0))
+        self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates:
+            self._arrived.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._arrived.wait(), float(params.get("timeout", 0)))
+        return self.updates[: int(params.get("limit", 100))]
+
+    def _send(self, method: str, params: dict[str, str]) -> dict[str, Any]:
+        self.sent.append((method, params))
+        chat = int(params["chat_id"])
+        message: dict[str, Any] = {
+            "message_id": next(message_ids),
+            "date": int(time.time()),
+            "chat": make_chat(chat),
+            "from": {"id": BOT_ID, "is_bot": True, "first_name": "benchmark"},
+        }
+        if method == "sendPhoto":
+            message["photo"] = [
+                {"file_id": params["photo"], "file_unique_id": "photo", "width": 1, "height": 1}
+            ]
+        else:
+            message["text"] = params.get("text", "")
+        return message
+
+    async def _call(self, method: str, params: dict[str, str]) -> Any:
+        match method:
+            case "getMe":
+                return {
+                    "id": BOT_ID,
+                    "is_bot": True,
+                    "first_name": "benchmark",
+                    "username": "benchmark_bot",
+                }
+            case "getUpdates":
+                return await self._get_updates(params)
+            case "getChat":
+                chat = int(params["chat_id"])
+                return {**make_chat(chat), "accent_color_id": 0, "max_reaction_count": 11}
+            case "getChatMember":
+                return {"status": "member", "user": make_user(int(params["user_id"]))}
+            case "getChatAdministrators":
+                return []
+            case "getUserProfilePhotos":
+                # everyone has an avatar, so that photos are sent too.
+                photo = {
+                    "file_id": f"avatar{params['user_id']}",
+                    "file_unique_id": f"avatar{params['user_id']}",
+                    "width": 160,
+                    "height": 160,
+                }
+                return {"total_count": 1, "photos": [[photo]]}
+            case _ if method.startswith("send") and method != "sendChatAction":
+                return self._send(method, params)
+            case _:
+                return True
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = {key: str(value) for key, value in (await request.post()).items()}
+        self.calls[method] += 1
+        return web.json_response({"ok": True, "result": await self._call(method, params)})
+
+    async def _handle_apk_index(self, _: web.Request) -> web.Response:
+        if self._apk_index is None:
+            self._apk_index = build_apk_index(self.packages)
+        return web.Response(body=self._apk_index)
+
+    async def start(self) -> int:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/apk/APKINDEX.tar.gz", self._handle_apk_index)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]  # type: ignore
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class LatencyRecorder(BaseMiddleware):
+    durations: list[float]
+    errors: int
+    last: float
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.durations = []
+        self.errors = 0
+        self.last = time.perf_counter()
+
+    def percentile(self, percentile: float) -> float:
+        if not self.durations:
+            return 0
+        durations = sorted(self.durations)
+        return durations[min(len(durations) - 1, int(len(durations) * percentile))]
+
+    async def wait(self, count: int, timeout: float) -> None:
+        deadline = time.perf_counter() + timeout
+        while len(self.durations) < count:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"only {len(self.durations)} of {count} updates processed.")
+            await asyncio.sleep(0.01)
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.last = time.perf_counter()
+            self.durations.append(self.last - start)
+
+
+@dataclass
+class Scenario:
+    name: str
+    updates: list[dict[str, Any]]
+    # processed before measuring, to fill the archive like a running bot.
+    warmup: list[dict[str, Any]] = field(default_factory=list)
+    ready: Callable[[], Awaitable[None]] | None = None
+
+
+def chat_burst(args: argparse.Namespace, rng: random.Random) -> Scenario:
+    groups = [next(group_ids) for _ in range(args.groups)]
+    members = range(FIRST_USER_ID, FIRST_USER_ID + args.members)
+    updates = [
+        make_message(rng.choice(groups), rng.choice(members), rng.choice(CHAT_TEXTS))
+        for _ in range(args.updates)
+    ]
+    return Scenario("chat", updates)
+
+
+def waifu_storm(args: argparse.Namespace, rng: random.Random) -> Scenario:
+    groups = [next(group_ids) for _ in range(args.groups)]
+    members = range(FIRST_USER_ID, FIRST_USER_ID + args.members)
+    warmup = [make_message(group, member, "hi") for group in groups for member in members]
+    updates = [
+        make_message(rng.choice(groups), rng.choice(members), "/waifu") for _ in range(args.updates)
+    ]
+    return Scenario("waifu", updates, warmup)
+
+
+async def pkgs_ready() -> None:
+    pkgs = sys.modules.get("yakusoku.modules.pkgs.main")
+    assert pkgs, "pkgs module is not loaded."
+    deadline = time.perf_counter() + 300
+    # the distro database is built from the fake repository in the startup of the module.
+    while any(
+        manager.updating or manager.last_updated() is None for manager in pkgs.managers.values()
+    ):
+        if time.perf_counter() > deadline:
+            raise TimeoutError("pkgs databases are not built in time.")
+        await asyncio.sleep(0.1)
+
+
+def pkgs_queries(args: argparse.Namespace, rng: random.Random) -> Scenario:
+    members = range(FIRST_USER_ID, FIRST_USER_ID + args.members)
+    updates: list[dict[str, Any]] = []
+    for _ in range(args.updates):
+        member = rng.choice(members)
+        package = rng.randrange(args.packages)
+        text = rng.choice(
+            (
+                f"/pkgs pkg{package}",
+                f"/pkgs {PKGS_DISTRO} pkg{package}",
+                f"/pkgs missing{package}",
+            )
+        )
+        updates.append(make_message(member, member, text))
+    return Scenario("pkgs", updates, ready=pkgs_ready)
+
+
+SCENARIOS = {"chat": chat_burst, "waifu": waifu_storm, "pkgs": pkgs_queries}
+
+
+def prepare_workspace(path: Path, port: int, args: argparse.Namespace) -> None:
+    # the package is linked into the workspace, so that data and config are created there.
+    (path / "yakusoku").symlink_to(SOURCE_PATH, target_is_directory=True)
+    config_path = path / "config"
+    config_path.mkdir()
+    bot_config = {
+        "token": TOKEN,
+        "owner": OWNER_ID,
+        "rate_limit": {"enabled": args.rate_limit},
+        "shedding": {"enabled": args.shedding},
+    }
+    pkgs_config = {
+        "distros": [
+            {"scheme": "apk", "name": PKGS_DISTRO, "repos": [f"http://127.0.0.1:{port}/apk"]}
+        ]
+    }
+    # json is valid yaml.
+    (config_path / "bot.yaml").write_text(json.dumps(bot_config))
+    (config_path / "pkgs.yaml").write_text(json.dumps(pkgs_config))
+    os.chdir(path)
+    sys.path.insert(0, str(path))
+
+
+async def benchmark(api: FakeBotApi, port: int, args: argparse.Namespace) -> None:
+    # imported after the workspace is prepared, for paths are resolved on import.
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.enums import ParseMode
+    from sqlmodel import SQLModel
+
+    from yakusoku import context
+    from yakusoku import dot as dot  # noqa: F401
+    from yakusoku import environ
+    from yakusoku.archive import archive_buffer
+    from yakusoku.module import ModuleManager
+    from yakusoku.prefilter import PrefilterMiddleware
+
+    default = DefaultBotProperties(parse_mode=ParseMode.HTML, link_preview_is_disabled=True)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}"))
+    bot = Bot(TOKEN, session=session, default=default)
+    if context.bot_config.rate_limit.enabled:
+        bot.session.middleware(context.outbound)
+    dispatcher = Dispatcher()
+    dispatcher.update.outer_middleware(context.update_shards)
+    dispatcher.message.outer_middleware(PrefilterMiddleware())
+
+    context.module_manager = module_manager = ModuleManager(dispatcher, context.metrics)
+    module_manager.import_modules_from(environ.module_path, args.exclude)
+    # registered after the sharding one, so that only the processing is timed.
+    recorder = LatencyRecorder()
+    dispatcher.update.outer_middleware(recorder)
+
+    await context.sql.init_db(SQLModel.metadata)
+    archive_buffer.start()
+    context.loop_monitor.start()
+    await module_manager.register_commands(bot)
+    polling = asyncio.create_task(
+        dispatcher.start_polling(bot, polling_timeout=1, handle_signals=False)
+    )
+
+    def count_queries() -> float:
+        return sum(context.metrics.db_queries.values.values())
+
+    rng = random.Random(args.seed)
+    print(
+        f"{'scenario':<10}{'updates':>9}{'seconds':>10}{'updates/s':>11}"
+        f"{'p50 ms':>9}{'p99 ms':>9}{'queries':>9}{'sent':>7}{'errors':>8}{'shed':>6}"
+    )
+    try:
+        for name in args.scenarios:
+            if name == "pkgs" and "pkgs" in args.exclude:
+                print(f"{name:<10}skipped, for the module is excluded.")
+                continue
+            scenario = SCENARIOS[name](args, rng)
+            if scenario.warmup:
+                recorder.reset()
+                api.push(*scenario.warmup)
+                await recorder.wait(len(scenario.warmup), args.timeout)
+                await archive_buffer.flush()
+            if scenario.ready:
+                await scenario.ready()
+
+            recorder.reset()
+            queries = count_queries()
+            sent = len(api.sent)
+            shed = sum(context.load_shedder.shed.values())
+            start = time.perf_counter()
+            api.push(*scenario.updates)
+            await recorder.wait(len(scenario.updates), args.timeout)
+            elapsed = recorder.last - start
+            # deferred archive writes are caused by the updates as well.
+            await archive_buffer.flush()
+
+            count = len(scenario.updates)
+            print(
+                f"{scenario.name:<10}{count:>9}{elapsed:>10.3f}{count / elapsed:>11.1f}"
+                f"{recorder.percentile(0.5) * 1000:>9.2f}{recorder.percentile(0.99) * 1000:>9.2f}"
+                f"{(count_queries() - queries) / count:>9.2f}{len(api.sent) - sent:>7}"
+                f"{recorder.errors:>8}{sum(context.load_shedder.shed.values()) - shed:>6}"
+            )
+    finally:
+        with contextlib.suppress(RuntimeError):
+            await dispatcher.stop_polling()
+        await polling
+        await context.loop_monitor.close()
+        await context.http_client.close()
+        await archive_buffer.close()
+        await context.sql.close()
+
+    calls = ", ".join(f"{method}={count}" for method, count in api.calls.most_common())
+    print(f"api calls: {calls}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    api = FakeBotApi(args.packages)
+    port = await api.start()
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="yakusoku-benchmark-") as workspace:
+            prepare_workspace(Path(workspace), port, args)
+            try:
+                await benchmark(api, port, args)
+            finally:
+                os.chdir(cwd)
+    finally:
+        await api.close()
+
+
+parser = argparse.ArgumentParser(description="run the bot against a fake bot api server.")
+parser.add_argument("scenarios", nargs="*", help=f"scenarios to run, in {', '.join(SCENARIOS)}.")
+parser.add_argument("--updates", type=int, default=2000, help="updates measured per scenario.")
+parser.add_argument("--groups", type=int, default=20)
+parser.add_argument("--members", type=int, default=50, help="members per group.")
+parser.add_argument("--packages", type=int, default=20000, help="packages in the fake repo.")
+parser.add_argument("--exclude", nargs="*", default=[], help="modules not to be imported.")
+parser.add_argument("--rate-limit", action="store_true", help="keep outbound rate limiting.")
+parser.add_argument("--shedding", action="store_true", help="keep shedding under load.")
+parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for updates.")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("-v", "--verbose", action="store_true")
+
+args = parser.parse_args()
+if unknown := set(args.scenarios) - SCENARIOS.keys():
+    parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}.")
+args.scenarios = args.scenarios or [*SCENARIOS]
+asyncio.run(main(args))
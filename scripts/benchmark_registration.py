@@ -0,0 +1,91 @@
+import inspect
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# it runs in a scratch working directory, so that data and config are never created in the
+# source tree, like 'python scripts/benchmark_registration.py'.
+
+SOURCE_PATH = Path(__file__).absolute().parents[1] / "src" / "yakusoku"
+
+costs = {"stack": 0.0, "owner": 0.0}
+registrations = 0
+
+
+def resolve_by_stack(module_path: Path, stacks: list[inspect.FrameInfo]) -> str | None:
+    # how handlers were resolved to modules before, kept for comparison.
+    result: str | None = None
+    for frame in stacks:
+        path = Path(frame.filename)
+        try:
+            name = path.relative_to(module_path).parts[0]
+        except ValueError:
+            continue
+        path = (module_path / name).relative_to(os.getcwd())
+        result = ".".join(path.parts)
+    return result
+
+
+def prepare_workspace(path: Path) -> None:
+    # the package is linked into the workspace, so that data and config are created there.
+    (path / "yakusoku").symlink_to(SOURCE_PATH, target_is_directory=True)
+    config_path = path / "config"
+    config_path.mkdir()
+    # json is valid yaml.
+    (config_path / "bot.yaml").write_text('{"token": "1000000:benchmark", "owner": 1}')
+    os.chdir(path)
+    sys.path.insert(0, str(path))
+
+
+def benchmark() -> None:
+    # imported after the workspace is prepared, for paths are resolved on import.
+    from aiogram import Dispatcher
+    from aiogram.dispatcher.event.telegram import TelegramEventObserver
+
+    from yakusoku import context
+    from yakusoku import dot as dot  # noqa: F401
+    from yakusoku import environ
+    from yakusoku.module import ModuleManager
+
+    register = TelegramEventObserver.register
+
+    def timed_register(self: TelegramEventObserver, *args: Any, **kwargs: Any) -> Any:
+        global registrations
+        registrations += 1
+        start = time.perf_counter()
+        resolve_by_stack(environ.module_path, inspect.stack())
+        costs["stack"] += time.perf_counter() - start
+        start = time.perf_counter()
+        context.module_manager.get_owner(self.router)
+        costs["owner"] += time.perf_counter() - start
+        return register(self, *args, **kwargs)
+
+    dispatcher = Dispatcher()
+    context.module_manager = module_manager = ModuleManager(dispatcher)
+    TelegramEventObserver.register = timed_register  # type: ignore
+    start = time.perf_counter()
+    module_manager.import_modules_from(environ.module_path)
+    elapsed = time.perf_counter() - start
+
+    print(f"imported {len(module_manager.loaded_modules)} modules in {elapsed:.3f}s.")
+    print(f"registered {registrations} handlers.")
+    print(f"resolving by stack: {costs['stack'] * 1000:.2f}ms in total.")
+    print(f"resolving by owner: {costs['owner'] * 1000:.2f}ms in total.")
+    if costs["owner"]:
+        print(f"resolving by owner is {costs['stack'] / costs['owner']:.0f}x as fast.")
+
+
+def main():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="yakusoku-benchmark-") as workspace:
+        prepare_workspace(Path(workspace))
+        try:
+            benchmark()
+        finally:
+            os.chdir(cwd)
+
+
+main()
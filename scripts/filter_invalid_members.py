@@ -4,17 +4,16 @@ from sqlalchemy.exc import NoResultFound
 
 from yakusoku import context
 from yakusoku.archive import group_manager, user_manager
+from yakusoku.archive import utils as archive_utils
 from yakusoku.modules.waifu.manager import WaifuManager
 from yakusoku.modules.waifu.registry import Registry as WaifuRegistry
 
 
 async def main():
     for group in await group_manager.get_groups():
-        for member in group.members:
-            try:
-                _ = await user_manager.get_user(member)
-            except NoResultFound:
-                await group_manager.remove_member(group.id, member)
+        # members without user info are dropped while iterating.
+        async for _ in archive_utils.get_members(group.id):
+            pass
 
         waifu_manager = WaifuManager(context.sql)
         waifu_registry = WaifuRegistry(waifu_manager)
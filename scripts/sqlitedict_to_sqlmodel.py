@@ -81,8 +81,8 @@ async def migrate_groups(bot: Bot):
         except (ChatNotFound, ChatDeleted):
             print(f"unable to get info of group {id}, skipped.")
             continue
-        group.members = list(members)  # type: ignore
-        await group_manager.update_group(group)
+        for member in members:  # type: ignore
+            await group_manager.add_member(id, member)  # type: ignore
         print(f"group {id} was migrated. {group=}")
 
 
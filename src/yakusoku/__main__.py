@@ -9,7 +9,10 @@ from sqlmodel import SQLModel
 from yakusoku import context
 from yakusoku import dot as dot
 from yakusoku import environ
+from yakusoku.archive import archive_buffer
 from yakusoku.module import ModuleManager
+from yakusoku.prefilter import PrefilterMiddleware
+from yakusoku.webhook import WebhookServer
 
 
 async def main() -> None:
@@ -21,20 +24,44 @@ async def main() -> None:
     )
 
     bot = Bot(context.bot_config.token, default=default)
+    if context.bot_config.rate_limit.enabled:
+        bot.session.middleware(context.outbound)
     dispatcher = Dispatcher()
+    dispatcher.update.outer_middleware(context.update_shards)
+    dispatcher.message.outer_middleware(PrefilterMiddleware())
 
-    context.module_manager = module_manager = ModuleManager(dispatcher)
+    context.module_manager = module_manager = ModuleManager(
+        dispatcher, context.metrics, context.bot_config.lazy_modules
+    )
     module_manager.import_modules_from(environ.module_path)
 
     await context.sql.init_db(SQLModel.metadata)
+    archive_buffer.start()
+    context.loop_monitor.start()
     await module_manager.register_commands(bot)
 
-    if context.bot_config.drop_pending_updates:
-        await bot.delete_webhook(True)  # drop pending updates.
-
-    await dispatcher.start_polling(bot)
+    metrics_runner = (
+        await context.metrics.serve(context.bot_config.metrics)
+        if context.bot_config.metrics
+        else None
+    )
 
-    await context.sql.close()
+    try:
+        if context.bot_config.webhook:
+            server = WebhookServer(dispatcher, bot, context.bot_config.webhook)
+            context.load_shedder.add_depth_source(lambda: server.pending)
+            await server.run(context.bot_config.drop_pending_updates)
+        else:
+            if context.bot_config.drop_pending_updates:
+                await bot.delete_webhook(True)  # drop pending updates.
+            await dispatcher.start_polling(bot)
+    finally:
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        await context.loop_monitor.close()
+        await context.http_client.close()
+        await archive_buffer.close()
+        await context.sql.close()
 
 
 asyncio.run(main())
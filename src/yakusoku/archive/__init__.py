@@ -1,6 +1,9 @@
 import os
 
+from yakusoku.archive.admin import AdminManager
 from yakusoku.archive.avatar import AvatarManager
+from yakusoku.archive.buffer import ArchiveBuffer
+from yakusoku.archive.config import config
 from yakusoku.archive.filecache import FileCacheManager
 from yakusoku.archive.group import GroupManager
 from yakusoku.archive.user import UserManager
@@ -10,7 +13,9 @@ from yakusoku.environ import data_path
 _FILE_CACHE_PATH = os.path.join(data_path, "filecache")
 os.makedirs(_FILE_CACHE_PATH, exist_ok=True)
 
+admin_manager = AdminManager(config.admin_ttl)
 avatar_manager = AvatarManager()
 file_cache_manager = FileCacheManager(_FILE_CACHE_PATH)
-group_manager = GroupManager(sql)
-user_manager = UserManager(sql)
+archive_buffer = ArchiveBuffer(sql, config.flush_interval, config.flush_threshold)
+group_manager = GroupManager(sql, archive_buffer, config.cache_size, config.cache_ttl)
+user_manager = UserManager(sql, archive_buffer, config.cache_size, config.cache_ttl)
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+
+_ADMIN_STATUSES = (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.CREATOR)
+
+
+class AdminManager:
+    ttl: timedelta
+    # entries are kept in the order of expiry, for all of them share the same ttl.
+    _admins: OrderedDict[int, tuple[float, frozenset[int]]]
+    _tasks: dict[int, asyncio.Task[frozenset[int]]]
+
+    def __init__(self, ttl: timedelta) -> None:
+        self.ttl = ttl
+        self._admins = OrderedDict()
+        self._tasks = {}
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._admins and next(iter(self._admins.values()))[0] < now:
+            self._admins.popitem(last=False)
+
+    async def _fetch_admins(self, bot: Bot, chat: int) -> frozenset[int]:
+        try:
+            admins = await bot.get_chat_administrators(chat)
+            result = frozenset(admin.user.id for admin in admins)
+            self._admins.pop(chat, None)
+            self._admins[chat] = (time.monotonic() + self.ttl.total_seconds(), result)
+            return result
+        finally:
+            del self._tasks[chat]
+
+    async def get_admins(self, bot: Bot, chat: int) -> frozenset[int]:
+        self._evict()
+        if cached := self._admins.get(chat):
+            return cached[1]
+        # share one request between concurrent checks of the same chat.
+        task = self._tasks.get(chat)
+        if not task:
+            task = self._tasks[chat] = asyncio.create_task(self._fetch_admins(bot, chat))
+        return await asyncio.shield(task)
+
+    async def is_admin(self, bot: Bot, chat: int, user: int) -> bool:
+        return user in await self.get_admins(bot, chat)
+
+    def update_member(self, chat: int, user: int, status: ChatMemberStatus | str) -> None:
+        cached = self._admins.get(chat)
+        if not cached:
+            return
+        expires, admins = cached
+        # replaced rather than changed, for the sets may be held by callers.
+        if status in _ADMIN_STATUSES:
+            self._admins[chat] = (expires, admins | {user})
+        else:
+            self._admins[chat] = (expires, admins - {user})
+
+    def remove_chat(self, chat: int) -> None:
+        self._admins.pop(chat, None)
@@ -0,0 +1,93 @@
+import asyncio
+import contextlib
+import logging
+import traceback
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from yakusoku.database import SQLSessionManager
+
+# a flusher writes its pending data with the session given and returns a callback,
+# which will be called to drop the written data after the transaction is committed.
+Flusher = Callable[[AsyncSession], Awaitable[Callable[[], None]]]
+
+logger = logging.getLogger()
+
+
+class ArchiveBuffer:
+    sql: SQLSessionManager
+    interval: timedelta
+    threshold: int
+    _flushers: list[Flusher]
+    _pending: int
+    _lock: asyncio.Lock
+    _wakeup: asyncio.Event
+    _task: asyncio.Task[None] | None
+
+    def __init__(self, sql: SQLSessionManager, interval: timedelta, threshold: int) -> None:
+        self.sql = sql
+        self.interval = interval
+        self.threshold = threshold
+        self._flushers = []
+        self._pending = 0
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # held through a flush, for writes which must not interleave with one.
+        return self._lock
+
+    def register(self, flusher: Flusher) -> None:
+        self._flushers.append(flusher)
+
+    def notify(self) -> None:
+        self._pending += 1
+        if self._pending >= self.threshold:
+            self._wakeup.set()
+
+    async def flush(self, force: bool = False) -> None:
+        async with self._lock:
+            if not self._pending and not force:
+                return
+            pending, self._pending = self._pending, 0
+            try:
+                async with self.sql.session() as session:
+                    callbacks = [await flusher(session) for flusher in self._flushers]
+                    await session.commit()
+            except Exception:
+                # the data is kept by the flushers, so it will be written in the next flush.
+                self._pending += pending
+                raise
+            for callback in callbacks:
+                callback()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.interval.total_seconds())
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.error("failed to flush archive buffer.")
+                traceback.print_exc()
+
+    def start(self) -> None:
+        assert self._task is None, "archive buffer was already started."
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush(True)
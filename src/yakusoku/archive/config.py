@@ -5,6 +5,11 @@ from yakusoku.config import Config
 
 class ArchiveConfig(Config):
     avatar_ttl: timedelta = timedelta(minutes=30)
+    admin_ttl: timedelta = timedelta(minutes=10)
+    flush_interval: timedelta = timedelta(seconds=5)
+    flush_threshold: int = 256
+    cache_size: int = 4096
+    cache_ttl: timedelta = timedelta(minutes=10)
 
 
 config = ArchiveConfig.load("archive")
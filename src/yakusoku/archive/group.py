@@ -1,65 +1,225 @@
+import contextlib
+from datetime import timedelta
+from typing import Any, Callable, Iterable
+
 import sqlmodel
 from aiogram.types import Chat
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from yakusoku.archive.models import GroupData
+from yakusoku.archive.buffer import ArchiveBuffer
+from yakusoku.archive.models import GroupData, GroupMemberData
 from yakusoku.database import SQLSessionManager
+from yakusoku.utils.cache import LRUCache
 
 
 class GroupManager:
     sql: SQLSessionManager
+    buffer: ArchiveBuffer | None
+    cache: LRUCache[dict[str, Any]]
+    _revision: int
+    _revisions: dict[int, int]
+    _pending: dict[int, GroupData]
+    _pending_members: set[tuple[int, int]]
 
-    def __init__(self, sql: SQLSessionManager) -> None:
+    def __init__(
+        self,
+        sql: SQLSessionManager,
+        buffer: ArchiveBuffer | None = None,
+        cache_size: int = 0,
+        cache_ttl: timedelta = timedelta(),
+    ) -> None:
         self.sql = sql
+        self.buffer = buffer
+        self.cache = LRUCache(cache_size, cache_ttl)
+        self._revision = 0
+        self._revisions = {}
+        self._pending = {}
+        self._pending_members = set()
+        if buffer:
+            buffer.register(self._flush)
+
+    def _exclusive(self) -> contextlib.AbstractAsyncContextManager[Any]:
+        # a flush in progress would write back what is being removed, so wait for it.
+        return self.buffer.lock if self.buffer else contextlib.nullcontext()
+
+    def _touch_members(self, group: int | None = None) -> None:
+        if group is None:
+            self._revision += 1
+        else:
+            self._revisions[group] = self._revisions.get(group, 0) + 1
+
+    def members_revision(self, group: int) -> int:
+        # both counters only grow, so the sum changes whenever members of the group may change.
+        return self._revision + self._revisions.get(group, 0)
+
+    @staticmethod
+    async def _write(session: AsyncSession, groups: Iterable[GroupData]) -> None:
+        values = [group.model_dump() for group in groups]
+        if not values:
+            return
+        statement = insert(GroupData).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[GroupData.id],  # type: ignore
+            set_={"name": statement.excluded.name, "username": statement.excluded.username},
+        )
+        await session.execute(statement)
+
+    async def _flush(self, session: AsyncSession) -> Callable[[], None]:
+        written = dict(self._pending)
+        members = set(self._pending_members)
+        await self._write(session, written.values())
+        touched: set[int] = set()
+        if members:
+            statement = (
+                insert(GroupMemberData)
+                .values([{"group": group, "member": member} for group, member in members])
+                .on_conflict_do_nothing()
+                .returning(sqlmodel.col(GroupMemberData.group))
+            )
+            results = await session.execute(statement)
+            touched.update(row[0] for row in results.all())
 
-    async def update_group_from_chat(self, chat: Chat) -> GroupData:
+        def done() -> None:
+            for id, group in written.items():
+                if self._pending.get(id) is group:
+                    del self._pending[id]
+                self.cache.pop(id)
+            self._pending_members -= members
+            for group in touched:
+                self._touch_members(group)
+
+        return done
+
+    async def update_group_from_chat(self, chat: Chat, deferred: bool = False) -> GroupData:
         try:
             data = await self.get_group(chat.id)
             data.update_from_chat(chat)
         except NoResultFound:
             data = GroupData.from_chat(chat)
-        await self.update_group(data)
+        await self.update_group(data, deferred)
         return data
 
-    async def update_group(self, group: GroupData) -> None:
-        async with self.sql.session() as session:
-            session.add(group)
+    async def update_group(self, group: GroupData, deferred: bool = False) -> None:
+        # the cached data is dropped once the change is committed, by the flush if deferred.
+        if deferred and self.buffer:
+            self._pending[group.id] = group
+            self.buffer.notify()
+            return
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending.pop(group.id, None)
+            await self._write(session, [group])
             await session.commit()
-            await session.refresh(group)
+        self.cache.pop(group.id)
 
     async def get_group(self, id: int) -> GroupData:
-        async with self.sql.session() as session:
-            statement = sqlmodel.select(GroupData).where(GroupData.id == id)
-            results = await session.execute(statement)
-            return results.one()[0]
+        # always return copies, so that callers cannot modify the cached or pending data.
+        if group := self._pending.get(id):
+            return GroupData.model_validate(group.model_dump())
+        if data := self.cache.get(id):
+            return GroupData.model_validate(data)
+        with self.cache.loading(id) as remember:
+            async with self.sql.session() as session:
+                statement = sqlmodel.select(GroupData).where(GroupData.id == id)
+                results = await session.execute(statement)
+                group = results.one()[0]
+            remember(group.model_dump())
+        return group
 
     async def get_groups(self) -> list[GroupData]:
         async with self.sql.session() as session:
             statement = sqlmodel.select(GroupData)
             results = await session.execute(statement)
-            return [row[0] for row in results.all()]
+            groups = {row[0].id: row[0] for row in results.all()}
+        groups.update(self._pending)
+        return list(groups.values())
 
     async def remove_group(self, id: int) -> None:
-        async with self.sql.session() as session:
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending.pop(id, None)
+            self._pending_members = {key for key in self._pending_members if key[0] != id}
             statement = sqlmodel.select(GroupData).where(GroupData.id == id)
             results = await session.execute(statement)
-            await session.delete(results.one()[0])
+            # a group only buffered has never been written.
+            if row := results.one_or_none():
+                await session.delete(row[0])
+            statement = sqlmodel.delete(GroupMemberData).where(
+                GroupMemberData.group == id  # type: ignore
+            )
+            await session.execute(statement)
             await session.commit()
+        self.cache.pop(id)
+        self._touch_members(id)
 
-    async def add_member(self, group: int, member: int) -> None:
-        data = await self.get_group(group)
-        if member in data.members:
+    async def get_members(self, group: int) -> list[int]:
+        async with self.sql.session() as session:
+            statement = sqlmodel.select(GroupMemberData.member).where(
+                GroupMemberData.group == group
+            )
+            results = await session.execute(statement)
+            members = [row[0] for row in results.all()]
+        pending = {member for id, member in self._pending_members if id == group}
+        return members + list(pending.difference(members))
+
+    async def is_member(self, group: int, member: int) -> bool:
+        if (group, member) in self._pending_members:
+            return True
+        async with self.sql.session() as session:
+            statement = (
+                sqlmodel.select(GroupMemberData.member)
+                .where(GroupMemberData.group == group)
+                .where(GroupMemberData.member == member)
+            )
+            results = await session.execute(statement)
+            return results.one_or_none() is not None
+
+    async def add_member(self, group: int, member: int, deferred: bool = False) -> None:
+        if deferred and self.buffer:
+            self._pending_members.add((group, member))
+            self.buffer.notify()
             return
-        members = list(data.members)
-        members.append(member)
-        data.members = members
-        await self.update_group(data)
+        self._pending_members.discard((group, member))
+        async with self.sql.session() as session:
+            statement = (
+                insert(GroupMemberData).values(group=group, member=member).on_conflict_do_nothing()
+            )
+            results = await session.execute(statement)
+            await session.commit()
+        if results.rowcount:
+            self._touch_members(group)
 
     async def remove_member(self, group: int, member: int) -> None:
-        data = await self.get_group(group)
-        if member not in data.members:
-            return
-        members = list(data.members)
-        members.remove(member)
-        data.members = members
-        await self.update_group(data)
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending_members.discard((group, member))
+            statement = (
+                sqlmodel.delete(GroupMemberData)
+                .where(GroupMemberData.group == group)  # type: ignore
+                .where(GroupMemberData.member == member)  # type: ignore
+            )
+            await session.execute(statement)
+            await session.commit()
+        self._touch_members(group)
+
+    async def remove_members(self, group: int, members: Iterable[int]) -> None:
+        members = list(members)
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending_members.difference_update((group, member) for member in members)
+            statement = (
+                sqlmodel.delete(GroupMemberData)
+                .where(GroupMemberData.group == group)  # type: ignore
+                .where(GroupMemberData.member.in_(members))  # type: ignore
+            )
+            await session.execute(statement)
+            await session.commit()
+        self._touch_members(group)
+
+    async def remove_member_from_all(self, member: int) -> None:
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending_members = {key for key in self._pending_members if key[1] != member}
+            statement = sqlmodel.delete(GroupMemberData).where(
+                GroupMemberData.member == member  # type: ignore
+            )
+            await session.execute(statement)
+            await session.commit()
+        self._touch_members()
@@ -7,7 +7,6 @@ class GroupData(SQLModel, table=True):
     id: int = Field(primary_key=True)
     name: str
     username: str | None
-    members: list[int] = Field(default=[], sa_column=Column(JSON))
 
     @staticmethod
     def from_chat(chat: Chat) -> "GroupData":
@@ -25,6 +24,11 @@ class GroupData(SQLModel, table=True):
         self.username = chat.username  # type: ignore
 
 
+class GroupMemberData(SQLModel, table=True):
+    group: int = Field(primary_key=True)
+    member: int = Field(primary_key=True, index=True)
+
+
 class UserData(SQLModel, table=True):
     id: int = Field(primary_key=True)
     name: str
@@ -64,3 +68,8 @@ class UserData(SQLModel, table=True):
             else []
         )
         self.is_bot = user.is_bot
+
+
+class UsernameData(SQLModel, table=True):
+    username: str = Field(primary_key=True)
+    user: int = Field(index=True)
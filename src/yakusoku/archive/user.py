@@ -1,71 +1,212 @@
+import contextlib
+from datetime import timedelta
+from typing import Any, Callable, Collection, Iterable
+
 import sqlmodel
 from aiogram.types import Chat, User
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from yakusoku.archive.models import UserData
+from yakusoku.archive.buffer import ArchiveBuffer
+from yakusoku.archive.models import UserData, UsernameData
 from yakusoku.constants import FILTERED_IDS
 from yakusoku.database import SQLSessionManager
+from yakusoku.utils.cache import LRUCache
+
+_CHUNK_SIZE = 500
 
 
 class UserManager:
     sql: SQLSessionManager
+    buffer: ArchiveBuffer | None
+    cache: LRUCache[dict[str, Any]]
+    _pending: dict[int, UserData]
 
-    def __init__(self, sql: SQLSessionManager) -> None:
+    def __init__(
+        self,
+        sql: SQLSessionManager,
+        buffer: ArchiveBuffer | None = None,
+        cache_size: int = 0,
+        cache_ttl: timedelta = timedelta(),
+    ) -> None:
         self.sql = sql
+        self.buffer = buffer
+        self.cache = LRUCache(cache_size, cache_ttl)
+        self._pending = {}
+        if buffer:
+            buffer.register(self._flush)
+
+    def _exclusive(self) -> contextlib.AbstractAsyncContextManager[Any]:
+        # a flush in progress would write back what is being removed, so wait for it.
+        return self.buffer.lock if self.buffer else contextlib.nullcontext()
 
     @staticmethod
     def _is_recordable(id: int) -> bool:
         return id > 0 and id not in FILTERED_IDS
 
+    @staticmethod
+    def _normalize_username(username: str) -> str:
+        return username.lower()
+
+    @staticmethod
+    async def _sync_usernames(session: AsyncSession, user: UserData) -> None:
+        usernames = {UserManager._normalize_username(username) for username in user.usernames}
+        statement = (
+            sqlmodel.delete(UsernameData)
+            .where(UsernameData.user == user.id)  # type: ignore
+            .where(UsernameData.username.not_in(usernames))  # type: ignore
+        )
+        await session.execute(statement)
+        if not usernames:
+            return
+        statement = insert(UsernameData).values(
+            [{"username": username, "user": user.id} for username in usernames]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[UsernameData.username], set_={"user": statement.excluded.user}
+        )
+        await session.execute(statement)
+
+    @staticmethod
+    async def _write(session: AsyncSession, users: Collection[UserData]) -> None:
+        if not users:
+            return
+        statement = insert(UserData).values([user.model_dump() for user in users])
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserData.id],  # type: ignore
+            set_={
+                "name": statement.excluded.name,
+                "usernames": statement.excluded.usernames,
+                "is_bot": statement.excluded.is_bot,
+            },
+        )
+        await session.execute(statement)
+        for user in users:
+            await UserManager._sync_usernames(session, user)
+
+    async def _flush(self, session: AsyncSession) -> Callable[[], None]:
+        written = dict(self._pending)
+        await self._write(session, written.values())
+
+        def done() -> None:
+            for id, user in written.items():
+                # keep the data updated while flushing.
+                if self._pending.get(id) is user:
+                    del self._pending[id]
+                self.cache.pop(id)
+
+        return done
+
+    def _lookup(self, id: int) -> UserData | None:
+        # always return copies, so that callers cannot modify the cached or pending data.
+        if user := self._pending.get(id):
+            return UserData.model_validate(user.model_dump())
+        if data := self.cache.get(id):
+            return UserData.model_validate(data)
+        return None
+
     async def get_user_from_username(self, username: str) -> UserData:
+        normalized = self._normalize_username(username)
+        for user in self._pending.values():
+            if normalized in map(self._normalize_username, user.usernames):
+                return UserData.model_validate(user.model_dump())
         async with self.sql.session() as session:
-            statement = sqlmodel.select(UserData).where(
-                UserData.usernames.contains(username)  # type: ignore
+            statement = (
+                sqlmodel.select(UserData)
+                .join(UsernameData, UsernameData.user == UserData.id)  # type: ignore
+                .where(UsernameData.username == normalized)
             )
             results = await session.execute(statement)
+            # not cached, for the user is unknown until queried, and so are changes made meanwhile.
             return results.one()[0]
 
     async def get_user(self, id: int) -> UserData:
+        if user := self._lookup(id):
+            return user
+        with self.cache.loading(id) as remember:
+            async with self.sql.session() as session:
+                statement = sqlmodel.select(UserData).where(UserData.id == id)
+                results = await session.execute(statement)
+                user = results.one()[0]
+            remember(user.model_dump())
+        return user
+
+    async def get_users_by_ids(
+        self, ids: Iterable[int], chunk_size: int = _CHUNK_SIZE
+    ) -> list[UserData]:
+        users: list[UserData] = []
+        missing: list[int] = []
+        for id in ids:
+            if user := self._lookup(id):
+                users.append(user)
+            else:
+                missing.append(id)
+        ids = missing
         async with self.sql.session() as session:
-            statement = sqlmodel.select(UserData).where(UserData.id == id)
-            results = await session.execute(statement)
-            return results.one()[0]
+            for start in range(0, len(ids), chunk_size):
+                end = start + chunk_size
+                chunk = ids[start:end]
+                with contextlib.ExitStack() as stack:
+                    remembers = {id: stack.enter_context(self.cache.loading(id)) for id in chunk}
+                    statement = sqlmodel.select(UserData).where(
+                        UserData.id.in_(chunk)  # type: ignore
+                    )
+                    results = await session.execute(statement)
+                    for row in results.all():
+                        remembers[row[0].id](row[0].model_dump())
+                        users.append(row[0])
+        return users
 
     async def get_users(self) -> list[UserData]:
         async with self.sql.session() as session:
             statement = sqlmodel.select(UserData)
             results = await session.execute(statement)
-            return [row[0] for row in results.all()]
+            users = {row[0].id: row[0] for row in results.all()}
+        users.update(self._pending)
+        return list(users.values())
 
-    async def update_user(self, user: UserData) -> None:
+    async def update_user(self, user: UserData, deferred: bool = False) -> None:
         if not UserManager._is_recordable(user.id):
             return
-        async with self.sql.session() as session:
-            session.add(user)
+        # the cached data is dropped once the change is committed, by the flush if deferred.
+        if deferred and self.buffer:
+            self._pending[user.id] = user
+            self.buffer.notify()
+            return
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending.pop(user.id, None)
+            await self._write(session, [user])
             await session.commit()
-            await session.refresh(user)
+        self.cache.pop(user.id)
 
-    async def update_from_user(self, user: User) -> UserData:
+    async def update_from_user(self, user: User, deferred: bool = False) -> UserData:
         try:
             data = await self.get_user(user.id)
             data.update_from_user(user)
         except NoResultFound:
             data = UserData.from_user(user)
-        await self.update_user(data)
+        await self.update_user(data, deferred)
         return data
 
-    async def update_from_chat(self, chat: Chat) -> UserData:
+    async def update_from_chat(self, chat: Chat, deferred: bool = False) -> UserData:
         try:
             data = await self.get_user(chat.id)
             data.update_from_chat(chat)
         except NoResultFound:
             data = UserData.from_chat(chat)
-        await self.update_user(data)
+        await self.update_user(data, deferred)
         return data
 
     async def remove_user(self, id: int) -> None:
-        async with self.sql.session() as session:
+        async with self._exclusive(), self.sql.session() as session:
+            self._pending.pop(id, None)
             statement = sqlmodel.select(UserData).where(UserData.id == id)
             results = await session.execute(statement)
-            await session.delete(results.one()[0])
+            # a user only buffered has never been written.
+            if row := results.one_or_none():
+                await session.delete(row[0])
+            statement = sqlmodel.delete(UsernameData).where(UsernameData.user == id)  # type: ignore
+            await session.execute(statement)
             await session.commit()
+        self.cache.pop(id)
@@ -12,11 +12,20 @@ from yakusoku.archive.exceptions import ChatDeleted, ChatNotFound
 from yakusoku.archive.models import GroupData, UserData
 from yakusoku.utils import exception
 
+_MEMBERS_CHUNK_SIZE = 500
+
 
 async def get_members(group: int) -> AsyncIterable[UserData]:
-    data = await group_manager.get_group(group)
-    for member in data.members:
-        yield await user_manager.get_user(member)
+    members = await group_manager.get_members(group)
+    for start in range(0, len(members), _MEMBERS_CHUNK_SIZE):
+        end = start + _MEMBERS_CHUNK_SIZE
+        chunk = members[start:end]
+        users = await user_manager.get_users_by_ids(chunk)
+        for user in users:
+            yield user
+        # drop the members whose user info was missing.
+        if dangling := set(chunk).difference(user.id for user in users):
+            await group_manager.remove_members(group, dangling)
 
 
 async def get_user_members(group: int) -> AsyncIterable[UserData]:
@@ -41,10 +50,8 @@ async def fetch_user(bot: Bot, id: int) -> UserData:
     except TelegramBadRequest as ex:
         with contextlib.suppress(Exception):
             await user_manager.remove_user(id)
-        for group in await group_manager.get_groups():
-            with contextlib.suppress(Exception):
-                group.members.remove(id)
-                await group_manager.update_group(group)
+        with contextlib.suppress(Exception):
+            await group_manager.remove_member_from_all(id)
         raise ChatDeleted from ex
     return await user_manager.update_from_chat(chat)
 
@@ -75,28 +82,26 @@ async def fetch_member(bot: Bot, group: int, member: int, check_user: bool = Fal
     return user
 
 
-async def parse_user(exp: str, bot: Bot | None = None) -> UserData:
-    if id := exception.try_or_default(lambda: int(exp)):
-        user = await user_manager.get_user(id)
+async def _resolve_user(exp: str) -> UserData:
     try:
-        user = await user_manager.get_user_from_username(exp.removeprefix("@"))
+        if (id := exception.try_or_default(lambda: int(exp))) is not None:
+            return await user_manager.get_user(id)
+        return await user_manager.get_user_from_username(exp.removeprefix("@"))
     except NoResultFound as ex:
         raise ChatNotFound from ex
+
+
+async def parse_user(exp: str, bot: Bot | None = None) -> UserData:
+    user = await _resolve_user(exp)
     if bot:
         return await fetch_user(bot, user.id)
     return user
 
 
 async def parse_member(exp: str, group: int, bot: Bot | None = None) -> UserData:
-    if id := exception.try_or_default(lambda: int(exp)):
-        member = await user_manager.get_user(id)
-    try:
-        member = await user_manager.get_user_from_username(exp.removeprefix("@"))
-    except NoResultFound as ex:
-        raise ChatNotFound from ex
-    data = await group_manager.get_group(group)
+    member = await _resolve_user(exp)
     if bot:
         return await fetch_member(bot, group, member.id)
-    if member.id not in data.members:
+    if not await group_manager.is_member(group, member.id):
         raise ChatNotFound
     return member
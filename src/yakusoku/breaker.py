@@ -0,0 +1,94 @@
+import time
+from collections import deque
+from enum import Enum
+
+from aiohttp import ClientError
+
+# how many recent latencies are kept to estimate the percentiles.
+_LATENCY_SAMPLES = 128
+# percentiles are not trusted until enough latencies are sampled.
+_MIN_LATENCY_SAMPLES = 16
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(ClientError):
+    upstream: str
+    retry_after: float
+
+    def __init__(self, upstream: str, retry_after: float) -> None:
+        super().__init__(f"circuit of {upstream} is open, retry after {retry_after:.1f}s.")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    upstream: str
+    failure_threshold: int
+    recovery_timeout: float
+    state: CircuitState
+    failures: int
+    rejected: int
+    hedged: int
+    latencies: deque[float]
+    _opened_at: float
+    _probing: bool
+
+    def __init__(self, upstream: str, failure_threshold: int, recovery_timeout: float) -> None:
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.hedged = 0
+        self.latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self._opened_at = 0
+        self._probing = False
+
+    @property
+    def retry_after(self) -> float:
+        return max(0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        match self.state:
+            case CircuitState.CLOSED:
+                return True
+            case CircuitState.OPEN if not self.retry_after:
+                # let a single request through to probe whether the upstream recovered.
+                self.state = CircuitState.HALF_OPEN
+                self._probing = True
+                return True
+            case CircuitState.HALF_OPEN if not self._probing:
+                self._probing = True
+                return True
+            case _:
+                self.rejected += 1
+                return False
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        # the probe was abandoned without an outcome, so the next request probes again.
+        self._probing = False
+
+    def percentile(self, percentile: float) -> float | None:
+        if len(self.latencies) < _MIN_LATENCY_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from types import TracebackType
+from typing import Any
+
+from aiohttp import (
+    ClientError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+)
+from aiohttp.typedefs import StrOrURL
+from yarl import URL
+
+from yakusoku.breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from yakusoku.configs import HttpConfig
+
+# only requests without side effects are safe to be sent twice.
+_HEDGEABLE_METHODS = ("GET", "HEAD")
+
+
+class _GuardedRequest:
+    client: "HttpClient"
+    module: str
+    method: str
+    url: StrOrURL
+    kwargs: dict[str, Any]
+    breaker: CircuitBreaker
+    _response: ClientResponse | None
+    _latency: float
+
+    def __init__(
+        self, client: "HttpClient", module: str, method: str, url: StrOrURL, kwargs: dict[str, Any]
+    ) -> None:
+        self.client = client
+        self.module = module
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.breaker = client.get_breaker(URL(url).host or "")
+        self._response = None
+        self._latency = 0
+
+    async def _request(self) -> ClientResponse:
+        return await self.client.session.request(self.method, self.url, **self.kwargs)
+
+    async def _send(self) -> ClientResponse:
+        tasks = [asyncio.ensure_future(self._request())]
+        winner: ClientResponse | None = None
+        try:
+            delay = self.client.hedge_delay(self.module, self.method, self.breaker)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    # the first request is slower than usual, race it against a second one.
+                    self.breaker.hedged += 1
+                    tasks.append(asyncio.ensure_future(self._request()))
+            error: BaseException | None = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if (exception := task.exception()) is None:
+                        winner = task.result()
+                        return winner
+                    error = error or exception
+            assert error
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and not task.exception() and task.result() is not winner:
+                    task.result().release()
+
+    async def __aenter__(self) -> ClientResponse:
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.upstream, self.breaker.retry_after)
+        start = time.monotonic()
+        try:
+            self._response = await self._send()
+        except (ClientError, asyncio.TimeoutError):
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self._latency = time.monotonic() - start
+        return self._response
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        assert self._response
+        # a response counts as a failure if the upstream is broken or it failed in reading.
+        if (
+            self._response.status >= 500
+            or self._response.status == 429
+            or isinstance(exc, (ClientError, asyncio.TimeoutError))
+        ):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(self._latency)
+        self._response.release()
+        await self._response.wait_for_close()
+
+
+class HttpClient:
+    config: HttpConfig
+    breakers: dict[str, CircuitBreaker]
+    trace_configs: list[TraceConfig]
+    _session: ClientSession | None
+
+    def __init__(self, config: HttpConfig, trace_configs: list[TraceConfig] | None = None) -> None:
+        self.config = config
+        self.breakers = {}
+        self.trace_configs = list(trace_configs or [])
+        self._session = None
+
+    @property
+    def session(self) -> ClientSession:
+        # created lazily, for a session has to be created in a running loop.
+        if not self._session or self._session.closed:
+            connector = TCPConnector(
+                limit=self.config.limit,
+                limit_per_host=self.config.limit_per_host,
+                ttl_dns_cache=int(self.config.dns_cache_ttl.total_seconds()),
+                keepalive_timeout=self.config.keepalive_timeout.total_seconds(),
+            )
+            self._session = ClientSession(connector=connector, trace_configs=self.trace_configs)
+        return self._session
+
+    def timeout(self, module: str) -> ClientTimeout:
+        timeout = self.config.timeouts.get(module, self.config.timeout)
+        return ClientTimeout(total=timeout.total_seconds())
+
+    def get_breaker(self, upstream: str) -> CircuitBreaker:
+        if not (breaker := self.breakers.get(upstream)):
+            breaker = self.breakers[upstream] = CircuitBreaker(
+                upstream,
+                self.config.failure_threshold,
+                self.config.recovery_timeout.total_seconds(),
+            )
+        return breaker
+
+    def hedge_delay(self, module: str, method: str, breaker: CircuitBreaker) -> float | None:
+        percentile = self.config.hedge_percentiles.get(module)
+        if (
+            percentile is None
+            or method.upper() not in _HEDGEABLE_METHODS
+            or breaker.state != CircuitState.CLOSED
+        ):
+            return None
+        return breaker.percentile(percentile)
+
+    def request(self, module: str, method: str, url: StrOrURL, **kwargs: Any) -> _GuardedRequest:
+        kwargs.setdefault("timeout", self.timeout(module))
+        return _GuardedRequest(self, module, method, url, kwargs)
+
+    def get(self, module: str, url: StrOrURL, **kwargs: Any) -> _GuardedRequest:
+        return self.request(module, "GET", url, **kwargs)
+
+    async def close(self) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
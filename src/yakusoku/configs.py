@@ -1,12 +1,120 @@
+from datetime import timedelta
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
 from yakusoku.config import Config
 
 
+class WebhookConfig(BaseModel):
+    url: str
+    path: str = "/webhook"
+    host: str = "127.0.0.1"
+    port: int = 8080
+    secret_token: str | None = None
+    queue_size: int = 1024
+    workers: int = 16
+    # what to do when the queue is full: wait for space, drop the update,
+    # or reject it to have telegram deliver it again later.
+    backpressure: Literal["block", "drop", "reject"] = "block"
+    shutdown_timeout: timedelta = timedelta(seconds=10)
+
+
+class ShardConfig(BaseModel):
+    # updates of the same chat run one at a time in order, while different chats run in parallel.
+    enabled: bool = True
+
+
+class RateLimitConfig(BaseModel):
+    enabled: bool = True
+    # rates are in messages per second.
+    global_rate: float = 30
+    global_burst: int = 30
+    chat_rate: float = 1
+    chat_burst: int = 3
+    group_rate: float = 20 / 60
+    group_burst: int = 5
+    max_retries: int = 3
+
+
+class MetricsConfig(BaseModel):
+    path: str = "/metrics"
+    host: str = "127.0.0.1"
+    port: int = 9464
+
+
+class MonitorConfig(BaseModel):
+    interval: timedelta = timedelta(milliseconds=500)
+    samples: int = 120
+    # stacks of callbacks blocking the loop longer than it are recorded, if set.
+    slow_callback_threshold: timedelta | None = None
+    max_slow_callbacks: int = 32
+
+
+class SheddingConfig(BaseModel):
+    enabled: bool = True
+    # the pressure is the larger of loop lag and queued updates over their thresholds,
+    # each time it is exceeded one more priority tier is shed.
+    lag_threshold: timedelta = timedelta(milliseconds=250)
+    queue_threshold: int = 128
+    # keeps shedding for a while after the pressure drops, to avoid flapping.
+    hold: timedelta = timedelta(seconds=10)
+
+
 class BotConfig(Config):
     token: str
     owner: int
     drop_pending_updates: bool = False
+    # defer importing lazy modules until their commands are first used.
+    lazy_modules: bool = False
+    webhook: WebhookConfig | None = None
+    shards: ShardConfig = ShardConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    monitor: MonitorConfig = MonitorConfig()
+    shedding: SheddingConfig = SheddingConfig()
+    # metrics are served in prometheus text format if configured.
+    metrics: MetricsConfig | None = None
 
 
 class CommonConfig(Config):
     # Capoo writing sticker
     writing_sticker: str = "CAACAgIAAxkBAAOpZLUxt3yp_ZiN40D4bJfh1GJbJ7MAAiMTAALo1uIScdlv0VTcu6UvBA"
+
+
+class HttpConfig(Config):
+    limit: int = 100
+    limit_per_host: int = 10
+    dns_cache_ttl: timedelta = timedelta(minutes=5)
+    keepalive_timeout: timedelta = timedelta(seconds=30)
+    timeout: timedelta = timedelta(seconds=30)
+    # timeouts by module name, overriding the default one.
+    timeouts: dict[str, timedelta] = {"pkgs": timedelta(minutes=10)}
+    cache_size: int = 256 * 1024 * 1024
+    # consecutive failures of an upstream host before requests to it fail fast.
+    failure_threshold: int = 5
+    recovery_timeout: timedelta = timedelta(seconds=30)
+    # percentiles of latency by module name, after which a second request is raced.
+    hedge_percentiles: dict[str, float] = {"greeting": 0.95}
+
+
+class DatabaseConfig(Config):
+    journal_mode: Literal["delete", "truncate", "persist", "memory", "wal", "off"] = "wal"
+    synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    mmap_size: int = 256 * 1024 * 1024
+    # negative values are in KiB, positive values are in pages.
+    cache_size: int = -64 * 1024
+    temp_store: Literal["default", "file", "memory"] = "memory"
+    busy_timeout: timedelta = timedelta(seconds=5)
+    pool_size: int = 5
+    max_overflow: int = 10
+
+    def pragmas(self) -> dict[str, Any]:
+        return {
+            # set busy timeout first to wait for the lock when switching journal mode.
+            "busy_timeout": int(self.busy_timeout.total_seconds() * 1000),
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "mmap_size": self.mmap_size,
+            "cache_size": self.cache_size,
+            "temp_store": self.temp_store,
+        }
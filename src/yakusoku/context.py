@@ -1,13 +1,42 @@
 import os
 
 from yakusoku import environ
-from yakusoku.configs import BotConfig, CommonConfig
+from yakusoku.client import HttpClient
+from yakusoku.configs import BotConfig, CommonConfig, DatabaseConfig, HttpConfig
 from yakusoku.database import SQLSessionManager
+from yakusoku.httpcache import HttpCache
+from yakusoku.metrics import Metrics
 from yakusoku.module import ModuleManager
+from yakusoku.monitor import LoopMonitor
+from yakusoku.outbound import OutboundMiddleware
+from yakusoku.shard import ShardedUpdateMiddleware
+from yakusoku.shedding import LoadShedder
 
 module_manager: ModuleManager
 
 bot_config = BotConfig.load("bot")
 common_config = CommonConfig.load("common")
+database_config = DatabaseConfig.load("database")
+http_config = HttpConfig.load("http")
 
-sql = SQLSessionManager(os.path.join(environ.data_path, "data.db"))
+metrics = Metrics()
+update_shards = ShardedUpdateMiddleware(bot_config.shards)
+outbound = OutboundMiddleware(bot_config.rate_limit)
+loop_monitor = LoopMonitor(bot_config.monitor)
+load_shedder = LoadShedder(
+    bot_config.shedding,
+    lambda: loop_monitor.lag,
+    lambda: update_shards.pending,
+)
+http_client = HttpClient(http_config, [metrics.trace_config()])
+http_cache = HttpCache(
+    http_client, os.path.join(environ.data_path, "httpcache"), http_config.cache_size
+)
+
+sql = SQLSessionManager(
+    os.path.join(environ.data_path, "data.db"),
+    database_config.pragmas(),
+    pool_size=database_config.pool_size,
+    max_overflow=database_config.max_overflow,
+)
+metrics.instrument_engine(sql.engine)
@@ -1,24 +1,49 @@
 from __future__ import annotations
 
-from sqlalchemy import MetaData, Table
+from typing import Any
+
+from sqlalchemy import MetaData, Table, event, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 
 class SQLSessionManager:
     _engine: AsyncEngine
     _session: async_sessionmaker[AsyncSession]
     _path: str
+    _pragmas: dict[str, Any]
 
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self,
+        path: str,
+        pragmas: dict[str, Any] | None = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+    ) -> None:
         self._path = path
-        self._engine = create_async_engine("sqlite+aiosqlite:///" + path)
+        self._pragmas = dict(pragmas or {})
+        # file databases are not pooled by default in some versions, so the pool is given.
+        self._engine = create_async_engine(
+            "sqlite+aiosqlite:///" + path,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+        )
+        event.listen(self._engine.sync_engine, "connect", self._apply_pragmas)
         self._session = async_sessionmaker(self._engine)
 
+    def _apply_pragmas(self, dbapi_connection: Any, _: Any) -> None:
+        # pragmas are per connection, so they have to be applied on every new connection.
+        cursor = dbapi_connection.cursor()
+        for name, value in self._pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
     @property
     def path(self) -> str:
         return self._path
@@ -31,6 +56,13 @@ class SQLSessionManager:
     def session(self) -> async_sessionmaker[AsyncSession]:
         return self._session
 
+    async def get_pragmas(self) -> dict[str, Any]:
+        async with self._engine.connect() as conn:
+            return {
+                name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in self._pragmas
+            }
+
     async def init_db(self, metadata: MetaData) -> None:
         async with self._engine.begin() as conn:
             await conn.run_sync(metadata.create_all)
@@ -1,18 +1,16 @@
-import importlib
-import inspect
 import logging
-import os
-import traceback
-from pathlib import Path
 from typing import Any
 
 from aiogram.dispatcher.event.handler import CallbackType
 from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters import Command, Filter
 
-from yakusoku import environ
+from yakusoku import context
 from yakusoku.dot.patch import patch, patched
 from yakusoku.dot.switch.filter import SwitchFilter
-from yakusoku.module import ModuleManager
+from yakusoku.module import ModuleManager, ModulePriority
+from yakusoku.prefilter import CommandPrefilter, Prefilter
+from yakusoku.shedding import ShedFilter
 
 logger = logging.getLogger()
 
@@ -20,19 +18,17 @@ logger = logging.getLogger()
 @patch(TelegramEventObserver)
 class PatchedHandler:
     @staticmethod
-    def _resolve_module(module_path: Path, stacks: list[inspect.FrameInfo]) -> str | None:
-        result: str | None = None
-        for frame in stacks:
-            path = Path(frame.filename)
-            try:
-                name = path.relative_to(module_path).parts[0]
-            except ValueError:
-                continue
-            path = (module_path / name).relative_to(os.getcwd())
-            package = ".".join(path.parts)
-            assert not result or result == package, "more than one module found in stack."
-            result = package
-        return result
+    def _split_prefilters(
+        filters: tuple[CallbackType, ...],
+    ) -> tuple[tuple[CallbackType, ...], tuple[CallbackType, ...]]:
+        # prefilters are cheap and reject most messages, so they run before any other filter.
+        prefilters: list[Filter] = [item for item in filters if isinstance(item, Prefilter)]
+        others = tuple(item for item in filters if not isinstance(item, Prefilter))
+        for item in others:
+            if isinstance(item, Command) and (prefilter := CommandPrefilter.from_command(item)):
+                prefilters.append(prefilter)
+                break
+        return tuple(prefilters), others
 
     @patched
     def register(
@@ -42,23 +38,22 @@ class PatchedHandler:
         flags: dict[str, Any] | None = None,
         **kwargs: Any,
     ) -> CallbackType:
-        module = PatchedHandler._resolve_module(environ.module_path, inspect.stack())
-        if module:
-            try:
-                base = importlib.import_module(module)
-                config = ModuleManager.get_config(base)
-                if config.can_disable:
-                    filters = (SwitchFilter(config), *filters)
-                else:
-                    logging.debug(
-                        f"ignored callback '{callback.__name__}' at '{module}' in switch patching for module can't disable."
-                    )
-            except Exception:
-                logging.error(f"failed to patch callback '{callback}' in switch patching.")
-                traceback.print_exc()
+        prefilters, filters = PatchedHandler._split_prefilters(filters)
+        module_manager: ModuleManager | None = getattr(context, "module_manager", None)
+        config = module_manager.get_owner(self.router) if module_manager else None
+        if config and config.priority != ModulePriority.ESSENTIAL:
+            prefilters = (*prefilters, ShedFilter(context.load_shedder, config))
+        if config:
+            if config.can_disable:
+                filters = (SwitchFilter(config), *filters)
+            else:
+                logging.debug(
+                    f"ignored callback '{callback.__name__}' at '{config.name}' in switch patching "
+                    "for module can't disable."
+                )
         else:
-            module = inspect.getmodule(callback)
             logging.debug(
-                f"ignored callback '{callback.__name__}' at '{module and module.__name__}' in switch patching for module was not found."
+                f"ignored callback '{callback.__name__}' at '{callback.__module__}' in switch "
+                "patching for module was not found."
             )
-        return self.__old_register(callback, *filters, flags=flags, **kwargs)
+        return self.__old_register(callback, *prefilters, *filters, flags=flags, **kwargs)
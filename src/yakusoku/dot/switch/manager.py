@@ -1,33 +1,85 @@
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable
+
 import sqlmodel
+from sqlalchemy.dialects.sqlite import insert
 
 from yakusoku.database import SQLSessionManager
 from yakusoku.module import ModuleConfig
+from yakusoku.utils.cache import LRUCache
 
 from .models import SwitchConfig
 
 
 class SwitchManager:
     sql: SQLSessionManager
+    _groups: LRUCache[dict[str, bool]]
+    # loads in flight by group, and the revisions bumped by updates made meanwhile.
+    _loads: Counter[int]
+    _revisions: dict[int, int]
 
-    def __init__(self, sql: SQLSessionManager) -> None:
+    def __init__(
+        self,
+        sql: SQLSessionManager,
+        cache_size: int = 4096,
+        cache_ttl: timedelta = timedelta(minutes=30),
+    ) -> None:
         self.sql = sql
+        self._groups = LRUCache(cache_size, cache_ttl)
+        self._loads = Counter()
+        self._revisions = {}
+
+    async def _load_group(self, group: int) -> dict[str, bool]:
+        while (switches := self._groups.get(group)) is None:
+            self._loads[group] += 1
+            revision = self._revisions.get(group, 0)
+            try:
+                async with self.sql.session() as session:
+                    statement = sqlmodel.select(SwitchConfig).where(SwitchConfig.group == group)
+                    results = await session.execute(statement)
+                    switches = {row[0].module: row[0].enabled for row in results.all()}
+            finally:
+                current = self._revisions.get(group, 0)
+                self._loads[group] -= 1
+                if not self._loads[group]:
+                    del self._loads[group]
+                    self._revisions.pop(group, None)
+            # the rows may be stale if the group was updated while querying, so query again.
+            if current == revision:
+                # another call may have loaded the group while querying.
+                if (loaded := self._groups.get(group)) is not None:
+                    return loaded
+                self._groups.set(group, switches)
+                return switches
+        return switches
 
     async def get_switch_config(self, group: int, module: ModuleConfig) -> SwitchConfig:
-        async with self.sql.session() as session:
-            statement = (
-                sqlmodel.select(SwitchConfig)
-                .where(SwitchConfig.group == group)
-                .where(SwitchConfig.module == module.name)
-            )
-            results = await session.execute(statement)
-            return (
-                row[0]
-                if (row := results.one_or_none())
-                else SwitchConfig(group=group, module=module.name, enabled=module.default_enabled)
+        return (await self.get_switch_configs(group, [module]))[0]
+
+    async def get_switch_configs(
+        self, group: int, modules: Iterable[ModuleConfig]
+    ) -> list[SwitchConfig]:
+        switches = await self._load_group(group)
+        return [
+            SwitchConfig(
+                group=group,
+                module=module.name,
+                enabled=switches.get(module.name, module.default_enabled),
             )
+            for module in modules
+        ]
 
     async def update_switch_config(self, config: SwitchConfig) -> None:
         async with self.sql.session() as session:
-            session.add(config)
+            statement = insert(SwitchConfig).values(config.model_dump())
+            statement = statement.on_conflict_do_update(
+                index_elements=[SwitchConfig.group, SwitchConfig.module],  # type: ignore
+                set_={"enabled": statement.excluded.enabled},
+            )
+            await session.execute(statement)
             await session.commit()
-            await session.refresh(config)
+        if config.group in self._loads:
+            self._revisions[config.group] = self._revisions.get(config.group, 0) + 1
+        if (switches := self._groups.get(config.group)) is not None:
+            switches[config.module] = config.enabled
@@ -1,14 +1,15 @@
-from aiogram import F
+from aiogram import Bot, F
 from aiogram.enums import ChatType
 from aiogram.filters import Filter, and_f, or_f
 from aiogram.types import CallbackQuery, ChatMemberUpdated, InlineQuery, Message
 
+from yakusoku.archive import admin_manager
 from yakusoku.context import bot_config
 
 
 class AdminFilter(Filter):
     async def __call__(
-        self, obj: Message | CallbackQuery | InlineQuery | ChatMemberUpdated
+        self, obj: Message | CallbackQuery | InlineQuery | ChatMemberUpdated, bot: Bot
     ) -> bool:
         if getattr(obj, "sender_chat", None):
             return False
@@ -25,8 +26,7 @@ class AdminFilter(Filter):
         else:
             return False
 
-        admins = await chat.get_administrators()
-        return any(admin.user.id == obj.from_user.id for admin in admins)
+        return await admin_manager.is_admin(bot, chat.id, obj.from_user.id)
 
 
 GroupFilter = F.chat.type.in_([ChatType.GROUP, ChatType.SUPERGROUP])
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping
+
+from aiofile import async_open
+from multidict import CIMultiDictProxy
+from pydantic import BaseModel
+from yarl import URL
+
+from yakusoku.client import HttpClient
+
+
+class HttpCacheEntry(BaseModel):
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    expires: float = 0
+    size: int = 0
+
+
+@dataclass
+class HttpCacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0
+
+
+def _parse_cache_control(value: str) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _freshness(headers: CIMultiDictProxy[str], ttl: timedelta | None) -> float | None:
+    # returns how long the response stays fresh, or None if it must not be stored.
+    directives = _parse_cache_control(headers.get("Cache-Control", ""))
+    if "no-store" in directives:
+        return None
+    if ttl is not None:
+        return ttl.total_seconds()
+    if "no-cache" in directives:
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if (value := directives.get(name)) and value.isdigit():
+            return max(0, int(value) - int(headers.get("Age", "0") or 0))
+    if expires := headers.get("Expires"):
+        try:
+            return max(0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class HttpCache:
+    client: HttpClient
+    path: str
+    max_size: int
+    stats: dict[str, HttpCacheStats]
+    _entries: OrderedDict[str, HttpCacheEntry] | None
+    _size: int
+    _loading: asyncio.Lock
+    _locks: dict[str, asyncio.Lock]
+    _writers: Counter[str]
+
+    def __init__(self, client: HttpClient, path: str, max_size: int) -> None:
+        self.client = client
+        self.path = path
+        self.max_size = max_size
+        self.stats = {}
+        self._entries = None
+        self._size = 0
+        self._loading = asyncio.Lock()
+        self._locks = {}
+        self._writers = Counter()
+
+    async def get_size(self) -> int:
+        await self._load_entries()
+        return self._size
+
+    def _get_paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.path, key)
+        return base, base + ".json"
+
+    def _scan_entries(self) -> tuple[OrderedDict[str, HttpCacheEntry], int]:
+        os.makedirs(self.path, exist_ok=True)
+        metas: list[os.DirEntry[str]] = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".tmp"):
+                # left by an interrupted write.
+                os.remove(entry.path)
+            elif entry.is_file() and entry.name.endswith(".json"):
+                metas.append(entry)
+        # the least recently used entries come first.
+        metas.sort(key=lambda entry: entry.stat().st_mtime)
+        entries = OrderedDict[str, HttpCacheEntry]()
+        size = 0
+        for meta in metas:
+            key = meta.name.removesuffix(".json")
+            body, _ = self._get_paths(key)
+            try:
+                with open(meta.path, "rb") as fp:
+                    entry = HttpCacheEntry.model_validate_json(fp.read())
+                assert os.path.getsize(body) == entry.size, "size mismatched."
+            except Exception:
+                self._remove_files(key)
+                continue
+            entries[key] = entry
+            size += entry.size
+        return entries, size
+
+    async def _load_entries(self) -> OrderedDict[str, HttpCacheEntry]:
+        async with self._loading:
+            if self._entries is None:
+                self._entries, self._size = await asyncio.to_thread(self._scan_entries)
+        return self._entries
+
+    def _remove_files(self, key: str) -> None:
+        for path in self._get_paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _replace_file(self, path: str, data: bytes) -> None:
+        # write to a temporary file of its own first, so that no broken file is left.
+        fd, temp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(temp, path)
+        except BaseException:
+            os.remove(temp)
+            raise
+
+    async def _evict(self) -> None:
+        entries = await self._load_entries()
+        while self._size > self.max_size and entries:
+            key, entry = entries.popitem(last=False)
+            self._size -= entry.size
+            await asyncio.to_thread(self._remove_files, key)
+
+    async def _write(self, key: str, entry: HttpCacheEntry, data: bytes | None) -> None:
+        entries = await self._load_entries()
+        body, meta = self._get_paths(key)
+        # writes of the same key are serialized, so that the body and its meta always match.
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._writers[key] += 1
+        try:
+            async with lock:
+                if data is not None:
+                    await asyncio.to_thread(self._replace_file, body, data)
+                await asyncio.to_thread(self._replace_file, meta, entry.model_dump_json().encode())
+                if previous := entries.pop(key, None):
+                    self._size -= previous.size
+                entries[key] = entry
+                self._size += entry.size
+        finally:
+            self._writers[key] -= 1
+            if not self._writers[key]:
+                del self._writers[key], self._locks[key]
+        await self._evict()
+
+    async def _read(self, key: str) -> bytes:
+        body, _ = self._get_paths(key)
+        async with async_open(body, "rb") as afp:
+            return await afp.read()
+
+    async def fetch(
+        self,
+        module: str,
+        url: str,
+        ttl: timedelta | None = None,
+        params: Mapping[str, str | int | float] | None = None,
+        headers: Mapping[str, str] | None = None,
+        raise_for_status: bool = False,
+    ) -> bytes:
+        full_url = str(URL(url).update_query(params) if params else URL(url))
+        key = hashlib.sha256(full_url.encode()).hexdigest()
+        stats = self.stats.setdefault(module, HttpCacheStats())
+        entries = await self._load_entries()
+
+        entry = entries.get(key)
+        if entry and entry.expires > time.time():
+            try:
+                data = await self._read(key)
+                entries.move_to_end(key)
+                # keep the order of use across restarts.
+                await asyncio.to_thread(os.utime, self._get_paths(key)[1])
+                stats.hits += 1
+                return data
+            except OSError:
+                entry = None
+
+        request_headers: dict[str, Any] = dict(headers or {})
+        if entry and entry.etag:
+            request_headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            request_headers["If-Modified-Since"] = entry.last_modified
+
+        async with self.client.get(module, full_url, headers=request_headers) as response:
+            if response.status == 304 and entry:
+                freshness = _freshness(response.headers, ttl)
+                if freshness is not None:
+                    entry.expires = time.time() + freshness
+                    await self._write(key, entry, None)
+                stats.revalidated += 1
+                return await self._read(key)
+            if raise_for_status:
+                response.raise_for_status()
+            data = await response.read()
+            stats.misses += 1
+            if response.status != 200 or len(data) > self.max_size:
+                return data
+            freshness = _freshness(response.headers, ttl)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            # nothing to reuse if it is neither fresh nor able to be revalidated.
+            if freshness is None or not (freshness or etag or last_modified):
+                return data
+            entry = HttpCacheEntry(
+                url=full_url,
+                etag=etag,
+                last_modified=last_modified,
+                expires=time.time() + freshness,
+                size=len(data),
+            )
+        await self._write(key, entry, data)
+        return data
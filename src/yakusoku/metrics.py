@@ -0,0 +1,304 @@
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import CancelHandler, SkipHandler
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, Update
+from aiohttp import (
+    ClientSession,
+    TraceConfig,
+    TraceRequestEndParams,
+    TraceRequestExceptionParams,
+    TraceRequestStartParams,
+    web,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from yakusoku.configs import MetricsConfig
+from yakusoku.utils.lock import lease_locks
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+_M = TypeVar("_M", "Counter", "Histogram")
+_P = TypeVar("_P")
+
+# how aiohttp calls back on a trace signal.
+_TraceCallback = Callable[[ClientSession, SimpleNamespace, _P], Awaitable[None]]
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _connect(signal: Any, callback: _TraceCallback[_P]) -> None:
+    # the signal is not typed with it, for aiosignal 1.4 changed how signals are parameterized.
+    signal.append(callback)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    name: str
+    help: str
+    labels: tuple[str, ...]
+    values: dict[tuple[str, ...], float]
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    name: str
+    help: str
+    labels: tuple[str, ...]
+    buckets: tuple[float, ...]
+    counts: dict[tuple[str, ...], list[int]]
+    sums: dict[tuple[str, ...], float]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = _DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = {}
+        self.sums = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        # the last count is of the '+Inf' bucket.
+        counts = self.counts.setdefault(labels, [0] * (len(self.buckets) + 1))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+        counts[-1] += 1
+        self.sums[labels] = self.sums.get(labels, 0) + value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = (*self.labels, "le")
+        for labels, counts in self.counts.items():
+            for bound, count in zip((*map(str, self.buckets), "+Inf"), counts):
+                yield f"{self.name}_bucket{_format_labels(names, (*labels, bound))} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {self.sums[labels]}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {counts[-1]}"
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    metrics: "Metrics"
+
+    def __init__(self, metrics: "Metrics") -> None:
+        self.metrics = metrics
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        update_type = event.event_type if isinstance(event, Update) else "unknown"
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.metrics.update_errors.inc(update_type)
+            raise
+        finally:
+            self.metrics.updates.inc(update_type)
+            self.metrics.update_duration.observe(time.perf_counter() - start, update_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    metrics: "Metrics"
+    module: str
+
+    def __init__(self, metrics: "Metrics", module: str) -> None:
+        self.metrics = metrics
+        self.module = module
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        name = handler_object.callback.__qualname__ if handler_object else "unknown"
+        labels = (self.module, name, type(event).__name__)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except (SkipHandler, CancelHandler):
+            raise
+        except Exception:
+            self.metrics.handler_errors.inc(*labels)
+            raise
+        finally:
+            self.metrics.handler_calls.inc(*labels)
+            self.metrics.handler_duration.observe(time.perf_counter() - start, *labels)
+
+
+class Metrics:
+    updates: Counter
+    update_errors: Counter
+    update_duration: Histogram
+    handler_calls: Counter
+    handler_errors: Counter
+    handler_duration: Histogram
+    db_queries: Counter
+    db_errors: Counter
+    db_duration: Histogram
+    http_requests: Counter
+    http_duration: Histogram
+    _metrics: list[Counter | Histogram]
+
+    def __init__(self) -> None:
+        self._metrics = []
+        self.updates = self._add(Counter("yakusoku_updates_total", "Updates processed.", ("type",)))
+        self.update_errors = self._add(
+            Counter("yakusoku_update_errors_total", "Updates failed.", ("type",))
+        )
+        self.update_duration = self._add(
+            Histogram("yakusoku_update_duration_seconds", "Update processing time.", ("type",))
+        )
+        handler_labels = ("module", "handler", "event")
+        self.handler_calls = self._add(
+            Counter("yakusoku_handler_calls_total", "Handler calls.", handler_labels)
+        )
+        self.handler_errors = self._add(
+            Counter("yakusoku_handler_errors_total", "Handler calls failed.", handler_labels)
+        )
+        self.handler_duration = self._add(
+            Histogram("yakusoku_handler_duration_seconds", "Handler call time.", handler_labels)
+        )
+        self.db_queries = self._add(
+            Counter("yakusoku_db_queries_total", "Database queries.", ("operation",))
+        )
+        self.db_errors = self._add(
+            Counter("yakusoku_db_errors_total", "Database queries failed.", ("operation",))
+        )
+        self.db_duration = self._add(
+            Histogram("yakusoku_db_query_duration_seconds", "Database query time.", ("operation",))
+        )
+        self.http_requests = self._add(
+            Counter(
+                "yakusoku_http_requests_total",
+                "Outbound HTTP requests.",
+                ("host", "method", "status"),
+            )
+        )
+        self.http_duration = self._add(
+            Histogram(
+                "yakusoku_http_request_duration_seconds",
+                "Outbound HTTP request time.",
+                ("host", "method"),
+            )
+        )
+
+    def _add(self, metric: _M) -> _M:
+        self._metrics.append(metric)
+        return metric
+
+    @staticmethod
+    def _collect_locks() -> list[Counter]:
+        # lease locks count by themselves, so they are collected when rendering.
+        labels = ("lock",)
+        acquired = Counter("yakusoku_lock_acquired_total", "Lease locks acquired.", labels)
+        contended = Counter("yakusoku_lock_contended_total", "Lease locks contended.", labels)
+        expired = Counter("yakusoku_lock_expired_total", "Lease locks expired.", labels)
+        for name, lock in lease_locks.items():
+            acquired.inc(name, amount=lock.acquired)
+            contended.inc(name, amount=lock.contended)
+            expired.inc(name, amount=lock.expired)
+        return [acquired, contended, expired]
+
+    def render(self) -> str:
+        metrics = (*self._metrics, *self._collect_locks())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def update_middleware(self) -> UpdateMetricsMiddleware:
+        return UpdateMetricsMiddleware(self)
+
+    def handler_middleware(self, module: str) -> HandlerMetricsMiddleware:
+        return HandlerMetricsMiddleware(self, module)
+
+    @staticmethod
+    def _get_operation(statement: str) -> str:
+        operation, *_ = statement.split(None, 1) or ["unknown"]
+        return operation.upper()
+
+    def instrument_engine(self, engine: AsyncEngine) -> None:
+        # a connection runs one statement at a time, but keep a stack in case of nesting.
+        def before_cursor_execute(conn: Connection, *_: Any) -> None:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn: Connection, _: Any, statement: str, *__: Any) -> None:
+            elapsed = time.perf_counter() - conn.info["query_start"].pop()
+            operation = self._get_operation(statement)
+            self.db_queries.inc(operation)
+            self.db_duration.observe(elapsed, operation)
+
+        def handle_error(context: ExceptionContext) -> None:
+            if context.connection and context.connection.info.get("query_start"):
+                context.connection.info["query_start"].pop()
+            operation = self._get_operation(context.statement or "")
+            self.db_queries.inc(operation)
+            self.db_errors.inc(operation)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(engine.sync_engine, "handle_error", handle_error)
+
+    def trace_config(self) -> TraceConfig:
+        async def on_request_start(
+            _: ClientSession, context: SimpleNamespace, __: TraceRequestStartParams, /
+        ) -> None:
+            context.start = time.perf_counter()
+
+        async def on_request_end(
+            _: ClientSession, context: SimpleNamespace, params: TraceRequestEndParams, /
+        ) -> None:
+            host = params.url.host or ""
+            self.http_requests.inc(host, params.method, str(params.response.status))
+            self.http_duration.observe(time.perf_counter() - context.start, host, params.method)
+
+        async def on_request_exception(
+            _: ClientSession, context: SimpleNamespace, params: TraceRequestExceptionParams, /
+        ) -> None:
+            host = params.url.host or ""
+            self.http_requests.inc(host, params.method, "error")
+            self.http_duration.observe(time.perf_counter() - context.start, host, params.method)
+
+        config = TraceConfig()
+        _connect(config.on_request_start, on_request_start)
+        _connect(config.on_request_end, on_request_end)
+        _connect(config.on_request_exception, on_request_exception)
+        return config
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        return web.Response(body=self.render().encode(), headers={"Content-Type": _CONTENT_TYPE})
+
+    async def serve(self, config: MetricsConfig) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_get(config.path, self._handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, config.host, config.port).start()
+        return runner
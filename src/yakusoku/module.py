@@ -1,12 +1,32 @@
+import asyncio
+import contextlib
 import importlib
 import inspect
+import logging
 import os
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
+from enum import IntEnum
 from pathlib import Path
 from types import ModuleType
+from typing import Any, Awaitable, Callable, Collection
 
 from aiogram import Bot, Router
-from aiogram.types import BotCommand
+from aiogram.types import BotCommand, Message, TelegramObject
+
+from yakusoku.metrics import Metrics
+from yakusoku.prefilter import MessageTraits, classify
+
+logger = logging.getLogger()
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class ModulePriority(IntEnum):
+    # essential modules are never shed, the others are shed from the lowest under pressure.
+    ESSENTIAL = 0
+    NORMAL = 1
+    PASSIVE = 2
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -16,6 +36,11 @@ class ModuleConfig:
     commands: dict[str, str]
     default_enabled: bool = True
     can_disable: bool = True
+    # the main of a lazy module is imported in the background after startup, or on its first
+    # command before then, if lazy loading is enabled.
+    # it only fits modules having nothing but handlers of their commands.
+    lazy: bool = False
+    priority: ModulePriority = ModulePriority.NORMAL
 
     def __post_init__(self) -> None:
         assert (
@@ -26,13 +51,25 @@ class ModuleConfig:
 @dataclass(frozen=True)
 class ModuleInfo:
     base: ModuleType
-    main: ModuleType
+    main: ModuleType | None
     config: ModuleConfig
 
 
 class ModuleManager:
     _router: Router
     _modules: dict[str, ModuleInfo]
+    _metrics: Metrics | None
+    _lazy: bool
+    # placeholders mark where the routers of lazy modules not imported yet go.
+    _placeholders: dict[str, tuple[Router, ModuleConfig]]
+    _lazy_commands: dict[str, str]
+    _loads: dict[str, asyncio.Task[None]]
+    _import_lock: asyncio.Lock
+    _preloading: asyncio.Task[None] | None
+    _owners: dict[Router, ModuleConfig]
+    _loading: tuple[str, ModuleConfig] | None
+    _created: list[Router] | None
+    import_times: dict[str, float]
 
     @property
     def loaded_modules(self) -> dict[str, ModuleInfo]:
@@ -42,9 +79,29 @@ class ModuleManager:
     def root_router(self) -> Router:
         return self._router
 
-    def __init__(self, root_router: Router) -> None:
+    def __init__(
+        self, root_router: Router, metrics: Metrics | None = None, lazy: bool = False
+    ) -> None:
         self._router = root_router
         self._modules = {}
+        self._metrics = metrics
+        self._lazy = lazy
+        self._placeholders = {}
+        self._lazy_commands = {}
+        self._loads = {}
+        self._import_lock = asyncio.Lock()
+        self._preloading = None
+        self._owners = {}
+        self._loading = None
+        self._created = None
+        self.import_times = {}
+        # only the dispatcher has the observer of raw updates.
+        if metrics and (observer := root_router.observers.get("update")):
+            observer.outer_middleware(metrics.update_middleware())
+        if lazy:
+            root_router.message.outer_middleware(self._load_on_command)
+            root_router.startup.register(self._start_preloading)
+            root_router.shutdown.register(self._stop_preloading)
 
     @staticmethod
     def _collect_modules(path: Path) -> set[str]:
@@ -75,27 +132,148 @@ class ModuleManager:
         ), "'__module_config__' should be 'ModuleConfig' instance."
         return config
 
+    def get_owner(self, router: Router) -> ModuleConfig | None:
+        # routers are owned by the module creating them, or the one including them.
+        current: Router | None = router
+        while current:
+            if config := self._owners.get(current):
+                return config
+            current = current.parent_router
+        # things registered while importing a module belong to it.
+        return self._loading[1] if self._loading else None
+
+    def _import_main(self, name: str, config: ModuleConfig) -> ModuleType:
+        start = time.perf_counter()
+        self._loading = (name, config)
+        try:
+            main = importlib.import_module(f"{name}.main")
+        finally:
+            self._loading = None
+        self.import_times[name] += time.perf_counter() - start
+        return main
+
+    def _attach_lazy_routers(self, name: str, created: list[Router]) -> None:
+        placeholder, _ = self._placeholders.pop(name)
+        # a new list is swapped in, so that events being propagated through the old one are
+        # not disturbed.
+        routers = self._router.sub_routers = list(self._router.sub_routers)
+        count = len(routers)
+        for router in created:
+            # it appends the router to the list.
+            self._router.include_router(router)
+        # then the routers take the place of the placeholder, keeping the order of modules.
+        appended = routers[count:]
+        del routers[count:]
+        index = routers.index(placeholder)
+        end = index + 1
+        routers[index:end] = appended
+
+    async def _load_lazy_module(self, name: str, config: ModuleConfig) -> None:
+        # imports run one at a time, for the module being imported is tracked by the manager.
+        async with self._import_lock:
+            start = time.perf_counter()
+            self._loading = (name, config)
+            created: list[Router] = []
+            self._created = created
+            try:
+                # only the import runs in a worker thread, the routers created by it are owned
+                # and attached here on the loop.
+                main = await asyncio.to_thread(importlib.import_module, f"{name}.main")
+            finally:
+                self._loading = self._created = None
+            self.import_times[name] += time.perf_counter() - start
+        self._owners.update((router, config) for router in created)
+        self._attach_lazy_routers(name, created)
+        self._modules[config.name] = replace(self._modules[config.name], main=main)
+        logger.info(f"lazy module '{config.name}' imported in {self.import_times[name]:.3f}s.")
+
+    async def load_lazy_module(self, name: str) -> None:
+        if name not in self._placeholders:
+            return
+        if not (task := self._loads.get(name)):
+            _, config = self._placeholders[name]
+            task = self._loads[name] = asyncio.create_task(self._load_lazy_module(name, config))
+        # shielded, so that a cancelled caller does not abort the import for the others.
+        await asyncio.shield(task)
+
+    async def preload_lazy_modules(self) -> None:
+        for name in list(self._placeholders):
+            try:
+                await self.load_lazy_module(name)
+            except Exception:
+                logger.exception(f"failed to import lazy module '{name}'.")
+
+    async def _start_preloading(self) -> None:
+        self._preloading = asyncio.create_task(self.preload_lazy_modules())
+
+    async def _stop_preloading(self) -> None:
+        if self._preloading:
+            self._preloading.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._preloading
+            self._preloading = None
+
+    async def _load_on_command(
+        self, handler: Handler, event: TelegramObject, data: dict[str, Any]
+    ) -> Any:
+        # the module is imported before the event is propagated, so that its routers get it.
+        if isinstance(event, Message) and self._placeholders:
+            traits: MessageTraits = data.get("message_traits") or classify(event)
+            if traits.command and (name := self._lazy_commands.get(traits.command)):
+                await self.load_lazy_module(name)
+        return await handler(event, data)
+
     def import_modules(self, *modules: str) -> None:
         for name in modules:
+            start = time.perf_counter()
             base = importlib.import_module(name)
+            self.import_times[name] = time.perf_counter() - start
             config = self.get_config(base)
             assert (
                 config.name not in self._modules
             ), f"module named '{config.name}' already existed."
-            main = importlib.import_module(f"{name}.main")
+            if self._lazy and config.lazy:
+                placeholder = self._router.include_router(Router(name=f"{name}.placeholder"))
+                self._placeholders[name] = (placeholder, config)
+                self._lazy_commands.update((command, name) for command in config.commands)
+                main = None
+            else:
+                main = self._import_main(name, config)
             info = ModuleInfo(base, main, config)
             self._modules[config.name] = info
 
-    def import_modules_from(self, path: Path) -> None:
-        modules = self._collect_modules(path)
+    def import_modules_from(self, path: Path, exclude: Collection[str] = ()) -> None:
+        # modules are excluded by the name of them in the path, like 'pkgs'.
+        modules = {
+            name for name in self._collect_modules(path) if name.rpartition(".")[2] not in exclude
+        }
         self.import_modules(*modules)
+        report = ", ".join(
+            f"{name.rpartition('.')[2]}={self.import_times[name]:.3f}s"
+            + (" (lazy)" if name in self._placeholders else "")
+            for name in sorted(modules, key=lambda name: -self.import_times[name])
+        )
+        total = sum(self.import_times[name] for name in modules)
+        logger.info(f"modules imported in {total:.3f}s: {report}")
 
     def create_router(self, name: str | None = None) -> Router:
-        if not name:
-            caller = inspect.stack()[1]
-            module = inspect.getmodule(caller.frame)
-            name = module.__name__ if module else None
+        if not name and self._loading:
+            name = f"{self._loading[0]}.main"
+        elif not name and (frame := inspect.currentframe()) and frame.f_back:
+            name = frame.f_back.f_globals.get("__name__")
         router = Router(name=name)
+        if self._metrics:
+            module = (name or "unknown").removesuffix(".main").rpartition(".")[2]
+            middleware = self._metrics.handler_middleware(module)
+            for event, observer in router.observers.items():
+                if event != "error":
+                    observer.middleware(middleware)
+        if self._created is not None:
+            # a lazy import runs in a worker thread, the router is owned and attached on the loop.
+            self._created.append(router)
+            return router
+        if self._loading:
+            self._owners[router] = self._loading[1]
         return self._router.include_router(router)
 
     async def register_commands(self, bot: Bot) -> None:
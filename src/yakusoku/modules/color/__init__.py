@@ -1,5 +1,5 @@
 from yakusoku.module import ModuleConfig
 
 __module_config__ = ModuleConfig(
-    name="color", description="颜色辅助工具", commands={"color": "Web 颜色计算/预览"}
+    name="color", description="颜色辅助工具", commands={"color": "Web 颜色计算/预览"}, lazy=True
 )
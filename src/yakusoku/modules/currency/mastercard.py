@@ -1,11 +1,12 @@
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Generic, TypeVar, cast
 
-import aiohttp
 import pydantic.alias_generators
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.dataclasses import dataclass
 
+from yakusoku.context import http_cache
+
 _T = TypeVar("_T")
 
 
@@ -75,9 +76,9 @@ async def conversion_rate(
         "transAmt": trans_amt,
     }
 
-    async with aiohttp.ClientSession() as client:
-        async with client.get(url, params=params) as resp:
-            json = await resp.read()
+    # rates of a past date never change, while the latest ones are updated daily.
+    ttl = timedelta(days=1) if fx_date else timedelta(hours=1)
+    json = await http_cache.fetch("currency", url, ttl, params)
 
     data = _parse_response_data(json, ConversionRateData)
     return data
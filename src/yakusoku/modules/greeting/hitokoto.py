@@ -1,6 +1,7 @@
-import aiohttp
 from pydantic import BaseModel, Field
 
+from yakusoku.context import http_client
+
 DEFAULT_API_URL = "https://v1.hitokoto.cn"
 
 TYPES = {
@@ -39,7 +40,6 @@ def get_type_desc(type: str) -> str:
 
 
 async def hitokoto(params: dict[str, str] | None = None, api: str | None = None) -> Sentence:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(api or DEFAULT_API_URL, params=params) as response:
-            data = await response.read()
-            return Sentence.model_validate_json(data)
+    async with http_client.get("greeting", api or DEFAULT_API_URL, params=params) as response:
+        data = await response.read()
+        return Sentence.model_validate_json(data)
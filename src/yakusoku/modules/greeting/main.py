@@ -8,6 +8,7 @@ from cashews import Cache
 from yakusoku.constants import FILTERED_IDS
 from yakusoku.context import module_manager, sql
 from yakusoku.filters import GroupFilter, NonAnonymousFilter
+from yakusoku.outbound import SendPriority, send_priority
 from yakusoku.utils import chat
 from yakusoku.utils.exception import try_or_default_async
 
@@ -57,7 +58,8 @@ async def greet(message: Message):
     )
     assert (user := message.sender_chat or message.from_user)
     user = chat.mention_html(user)
-    await message.reply(f"{greeting}! {user}.\n\n" f"{sentence_content}")
+    with send_priority(SendPriority.PASSIVE):
+        await message.reply(f"{greeting}! {user}.\n\n" f"{sentence_content}")
 
 
 @router.message(GroupFilter, NonAnonymousFilter)
@@ -1,8 +1,9 @@
-from yakusoku.module import ModuleConfig
+from yakusoku.module import ModuleConfig, ModulePriority
 
 __module_config__ = ModuleConfig(
     name="help",
     description="帮助",
     commands={"help": "帮助菜单"},
     can_disable=False,
+    priority=ModulePriority.ESSENTIAL,
 )
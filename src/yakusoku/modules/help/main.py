@@ -12,14 +12,16 @@ router = module_manager.create_router()
 @router.message(Command("help"))
 async def help(message: Message):
     reply = ""
-    group = message.chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]
-    for module in sorted(module_manager.loaded_modules.values(), key=lambda x: x.config.name):
-        config = module.config
-        if group:
-            switch = await switch_manager.get_switch_config(message.chat.id, config)
-            enabled = switch.enabled
-        else:
-            enabled = True
+    configs = sorted(
+        (module.config for module in module_manager.loaded_modules.values()),
+        key=lambda x: x.name,
+    )
+    if message.chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
+        switches = await switch_manager.get_switch_configs(message.chat.id, configs)
+        enabled_list = [switch.enabled for switch in switches]
+    else:
+        enabled_list = [True] * len(configs)
+    for config, enabled in zip(configs, enabled_list):
         if enabled:
             reply += f"<u><b>=== {config.name} ({config.description}) ===</b></u>\n"
             if config.commands:
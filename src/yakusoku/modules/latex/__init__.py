@@ -1,5 +1,5 @@
 from yakusoku.module import ModuleConfig
 
 __module_config__ = ModuleConfig(
-    name="latex", description="LaTeX", commands={"latex": "渲染 LaTeX 公式"}
+    name="latex", description="LaTeX", commands={"latex": "渲染 LaTeX 公式"}, lazy=True
 )
@@ -7,4 +7,5 @@ __module_config__ = ModuleConfig(
         "magic": "获取文件类型详细信息",
         "mime": "获取文件 MIME",
     },
+    lazy=True,
 )
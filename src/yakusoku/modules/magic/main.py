@@ -1,13 +1,12 @@
 import html
 import traceback
 
-import aiohttp
 import magic
 from aiogram import Bot
 from aiogram.filters import Command, CommandObject
 from aiogram.types import Downloadable, Message
 
-from yakusoku.context import module_manager
+from yakusoku.context import http_client, module_manager
 
 router = module_manager.create_router()
 
@@ -34,10 +33,9 @@ async def get_file_type(bot: Bot, message: Message, mime: bool) -> str:
     url = bot.session.api.file_url(bot.token, path)
     size = 512  # read 512 bytes only
 
-    async with aiohttp.ClientSession(read_bufsize=size) as session:
-        async with session.get(url) as request:
-            request.raise_for_status()
-            header = await request.content.read(size)
+    async with http_client.get("magic", url, read_bufsize=size) as request:
+        request.raise_for_status()
+        header = await request.content.read(size)
 
     return magic.from_buffer(header, mime)
 
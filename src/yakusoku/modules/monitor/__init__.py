@@ -0,0 +1,9 @@
+from yakusoku.module import ModuleConfig, ModulePriority
+
+__module_config__ = ModuleConfig(
+    name="monitor",
+    description="事件循环监控",
+    commands={"monitor": "查看事件循环延迟和阻塞调用 (仅限主人)"},
+    can_disable=False,
+    priority=ModulePriority.ESSENTIAL,
+)
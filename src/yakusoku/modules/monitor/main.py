@@ -0,0 +1,51 @@
+import collections
+import html
+
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from yakusoku.context import loop_monitor, module_manager
+from yakusoku.filters import OwnerFilter
+
+router = module_manager.create_router()
+
+_RECENT_COUNT = 5
+# keep the reply within the message length limit.
+_MAX_STACK_LENGTH = 3000
+
+
+@router.message(Command("monitor"), OwnerFilter)
+async def monitor(message: Message, command: CommandObject):
+    records = list(loop_monitor.slow_callbacks)
+
+    if command.args:
+        if not command.args.isdigit() or not 0 < int(command.args) <= len(records):
+            return await message.reply(f"没有这条记录捏, 目前共有 {len(records)} 条w")
+        record = records[-int(command.args)]
+        stack = html.escape("".join(record.stack)[-_MAX_STACK_LENGTH:])
+        return await message.reply(
+            f"{record.time.replace(microsecond=0)} 阻塞 {record.duration:.2f}s"
+            f" ({record.module or '未知模块'}):\n<pre>{stack}</pre>"
+        )
+
+    lag_info = (
+        f"- 当前: {loop_monitor.lag * 1000:.1f}ms\n"
+        f"- P50 / P99: {loop_monitor.percentile(0.5) * 1000:.1f}ms"
+        f" / {loop_monitor.percentile(0.99) * 1000:.1f}ms\n"
+        f"- 最大: {loop_monitor.max_lag * 1000:.1f}ms"
+    )
+
+    if loop_monitor.config.slow_callback_threshold is None:
+        slow_info = "- 未启用"
+    elif not records:
+        slow_info = "- 暂无记录"
+    else:
+        counter = collections.Counter(record.module or "未知模块" for record in records)
+        slow_info = "\n".join(f"- {module}: {count} 次" for module, count in counter.most_common())
+        slow_info += "\n\n最近记录 (使用 /monitor &lt;序号&gt; 查看调用栈):\n" + "\n".join(
+            f"{index}. {record.time.replace(microsecond=0)} {record.module or '未知模块'}"
+            f" 阻塞 {record.duration:.2f}s"
+            for index, record in enumerate(reversed(records[-_RECENT_COUNT:]), 1)
+        )
+
+    await message.reply(f"事件循环延迟:\n{lag_info}\n\n阻塞调用:\n{slow_info}")
@@ -1,3 +1,8 @@
-from yakusoku.module import ModuleConfig
+from yakusoku.module import ModuleConfig, ModulePriority
 
-__module_config__ = ModuleConfig(name="pixiv", description="自动解析 Pixiv 链接", commands={})
+__module_config__ = ModuleConfig(
+    name="pixiv",
+    description="自动解析 Pixiv 链接",
+    commands={},
+    priority=ModulePriority.PASSIVE,
+)
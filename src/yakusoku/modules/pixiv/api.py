@@ -1,7 +1,8 @@
 import urllib.parse
+from datetime import timedelta
 from typing import TypeVar
 
-from aiohttp import ClientSession
+from yakusoku.context import http_cache, http_client
 
 from .types import AjaxResponse, Illust, IllustPage, UgoiraMeta
 
@@ -9,6 +10,7 @@ _T = TypeVar("_T")
 
 _API = "https://www.pixiv.net/"
 _PIXIV_CAT = "https://pixiv.cat"
+_METADATA_TTL = timedelta(hours=1)
 
 
 class ApiError(Exception):
@@ -25,25 +27,19 @@ def _extract_body(response: AjaxResponse[_T]) -> _T:
 
 
 async def illust(id: int) -> Illust:
-    async with ClientSession(_API) as session:
-        async with session.get(f"/ajax/illust/{id}") as response:
-            data = await response.read()
+    data = await http_cache.fetch("pixiv", f"{_API}ajax/illust/{id}", _METADATA_TTL)
     response = AjaxResponse[Illust].model_validate_json(data)
     return _extract_body(response)
 
 
 async def illust_pages(id: int) -> list[IllustPage]:
-    async with ClientSession(_API) as session:
-        async with session.get(f"/ajax/illust/{id}/pages") as response:
-            data = await response.read()
+    data = await http_cache.fetch("pixiv", f"{_API}ajax/illust/{id}/pages", _METADATA_TTL)
     response = AjaxResponse[list[IllustPage]].model_validate_json(data)
     return _extract_body(response)
 
 
 async def illust_ugoira_meta(id: int) -> UgoiraMeta:
-    async with ClientSession(_API) as session:
-        async with session.get(f"/ajax/illust/{id}/ugoira_meta") as response:
-            data = await response.read()
+    data = await http_cache.fetch("pixiv", f"{_API}ajax/illust/{id}/ugoira_meta", _METADATA_TTL)
     response = AjaxResponse[UgoiraMeta].model_validate_json(data)
     return _extract_body(response)
 
@@ -54,9 +50,8 @@ async def download_pximg(url: str, proxy: str | None = None) -> bytes:
         parsed = urllib.parse.urlparse(url)
         url = parsed._replace(netloc=proxy).geturl()
 
-    async with ClientSession(headers=headers) as session:
-        async with session.get(url) as response:
-            return await response.read()
+    async with http_client.get("pixiv", url, headers=headers) as response:
+        return await response.read()
 
 
 async def download_from_pixiv_cat(
@@ -66,6 +61,5 @@ async def download_from_pixiv_cat(
     filename = f"{id}-{page}.png" if page else f"{id}.png"
     url = urllib.parse.urljoin(base, filename)
 
-    async with ClientSession() as session:
-        async with session.get(url) as response:
-            return await response.read()
+    async with http_client.get("pixiv", url) as response:
+        return await response.read()
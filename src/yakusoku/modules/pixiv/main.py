@@ -13,6 +13,8 @@ from aiogram.types import (
 )
 
 from yakusoku.context import module_manager
+from yakusoku.outbound import SendPriority, send_priority
+from yakusoku.prefilter import MessageTraits, Prefilter, register_pattern
 
 from . import api, ugoira
 from .config import PixivConfig
@@ -22,6 +24,7 @@ _ARTWORK_URL_REGEX = re.compile(
     r"pixiv\.net/(?:[a-z]*/)?(?:artworks/|i/|member_illust\.php\?(?:[\w=&]*\&|)illust_id=)(\d+)",
     re.IGNORECASE,
 )
+register_pattern("pixiv", _ARTWORK_URL_REGEX)
 
 
 router = module_manager.create_router()
@@ -174,11 +177,12 @@ async def download(query: CallbackQuery, callback_data: Download):
         await reply.delete()
 
 
-@router.message()
-async def match_url(message: Message):
+@router.message(Prefilter("pixiv"))
+async def match_url(message: Message, message_traits: MessageTraits):
     if not message.text:
         raise SkipHandler
-    ids = find_illust_ids(message.text)
-    for id in ids:
-        await send_illust(message, id)
+    ids = [id for url in message_traits.matches["pixiv"] for id in find_illust_ids(url)]
+    with send_priority(SendPriority.PASSIVE):
+        for id in ids:
+            await send_illust(message, id)
     raise SkipHandler
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from io import BytesIO, IOBase, TextIOWrapper
 from typing import IO, AsyncIterable, Generator
 
-from aiohttp import ClientSession
+from yakusoku.context import http_cache
 
 from ..types import Package
 from . import PackageProvider, PackageRepository
@@ -104,10 +104,7 @@ class Alpm(PackageProvider[AlpmRepository]):
                 yield self._parse_fields(fields, repo)
 
     async def fetch(self, repo: AlpmRepository) -> AsyncIterable[Package]:
-        async with ClientSession() as session:
-            async with session.get(repo.db_url()) as response:
-                response.raise_for_status()
-                compressed = BytesIO(await response.read())
+        compressed = BytesIO(await http_cache.fetch("pkgs", repo.db_url(), raise_for_status=True))
 
         with gzip.GzipFile(mode="r", fileobj=compressed) as archive:
             for package in self._iter_packages(archive, repo):
@@ -9,7 +9,8 @@ from tempfile import TemporaryDirectory
 from typing import AsyncGenerator, AsyncIterable, cast
 
 from aiofile import TextFileWrapper, async_open
-from aiohttp import ClientSession
+
+from yakusoku.context import http_cache
 
 from ..types import Package
 from . import PackageProvider, PackageRepository
@@ -83,10 +84,7 @@ class Apk(PackageProvider[ApkRepository]):
                         return
 
     async def fetch(self, repo: ApkRepository) -> AsyncIterable[Package]:
-        async with ClientSession() as session:
-            async with session.get(repo.db_url()) as response:
-                response.raise_for_status()
-                compressed = BytesIO(await response.read())
+        compressed = BytesIO(await http_cache.fetch("pkgs", repo.db_url(), raise_for_status=True))
 
         with gzip.GzipFile(mode="r", fileobj=compressed) as archive:
             async for package in self._iter_packages(archive, repo):
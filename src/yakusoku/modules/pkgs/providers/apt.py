@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from io import BytesIO, IOBase
 from typing import AsyncIterable, Generator
 
-from aiohttp import ClientSession
+from yakusoku.context import http_cache
 
 from ..types import Package
 from . import PackageProvider, PackageRepository
@@ -99,10 +99,9 @@ class Apt(PackageProvider[AptComponent]):
                 return
 
     async def fetch(self, repo: AptComponent) -> AsyncIterable[Package]:
-        async with ClientSession() as session:
-            async with session.get(repo.packages_url()) as response:
-                response.raise_for_status()
-                compressed = BytesIO(await response.read())
+        compressed = BytesIO(
+            await http_cache.fetch("pkgs", repo.packages_url(), raise_for_status=True)
+        )
 
         with lzma.LZMAFile(compressed, format=lzma.FORMAT_XZ) as packages:
             for package in self._iter_packages(packages, repo):
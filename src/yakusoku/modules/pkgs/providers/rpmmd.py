@@ -8,7 +8,8 @@ from xml.etree import ElementTree
 
 import magic
 import zstandard
-from aiohttp import ClientSession
+
+from yakusoku.context import http_cache
 
 from ..types import Package
 from . import PackageProvider, PackageRepository
@@ -93,10 +94,7 @@ class RpmMd(PackageProvider[RpmMdRepository]):
     async def _fetch_primary_data_location(self, repo: RpmMdRepository) -> str:
         url = repo.url("repodata", "repomd.xml")
 
-        async with ClientSession() as session:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                xml = BytesIO(await response.read())
+        xml = BytesIO(await http_cache.fetch("pkgs", url, raise_for_status=True))
 
         location = await self._find_primary_data_location(xml)
         return location
@@ -115,10 +113,7 @@ class RpmMd(PackageProvider[RpmMdRepository]):
     async def fetch(self, repo: RpmMdRepository) -> AsyncIterable[Package]:
         location = await self._fetch_primary_data_location(repo)
 
-        async with ClientSession() as session:
-            async with session.get(repo.url(location)) as response:
-                response.raise_for_status()
-                data = BytesIO(await response.read())
+        data = BytesIO(await http_cache.fetch("pkgs", repo.url(location), raise_for_status=True))
 
         mime = magic.from_buffer(data.read(16), mime=True)
         data.seek(0)
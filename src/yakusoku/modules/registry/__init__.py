@@ -1,8 +1,9 @@
-from yakusoku.module import ModuleConfig
+from yakusoku.module import ModuleConfig, ModulePriority
 
 __module_config__ = ModuleConfig(
     name="registry",
     description="群成员登记",
     commands={},
     can_disable=False,
+    priority=ModulePriority.ESSENTIAL,
 )
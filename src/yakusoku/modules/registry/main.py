@@ -8,7 +8,7 @@ from aiogram.filters import Command
 from aiogram.types import Chat, ChatMemberUpdated, Message, User
 from cashews.wrapper import Cache
 
-from yakusoku.archive import group_manager, user_manager
+from yakusoku.archive import admin_manager, group_manager, user_manager
 from yakusoku.archive import utils as archive_utils
 from yakusoku.config import Config
 from yakusoku.context import module_manager
@@ -36,6 +36,7 @@ async def joined(bot: Bot, group: Chat, member: User) -> None:
 
 async def left(bot: Bot, group: Chat, member: User) -> None:
     if member.id == bot.id:
+        admin_manager.remove_chat(group.id)
         with contextlib.suppress(Exception):
             await group_manager.remove_group(group.id)
     else:
@@ -64,6 +65,7 @@ async def permission_check(bot: Bot, update: ChatMemberUpdated) -> None:
 @router.chat_member()
 async def member_update(update: ChatMemberUpdated, bot: Bot):
     group, member = update.chat, update.new_chat_member
+    admin_manager.update_member(group.id, member.user.id, member.status)
     if member.status == ChatMemberStatus.MEMBER:
         await joined(bot, group, member.user)
     elif member.status in [ChatMemberStatus.LEFT, ChatMemberStatus.KICKED]:
@@ -78,11 +80,11 @@ async def member_update(update: ChatMemberUpdated, bot: Bot):
 async def message_received(message: Message):
     assert message.from_user
     if message.chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
-        await group_manager.update_group_from_chat(message.chat)
-        await group_manager.add_member(message.chat.id, message.from_user.id)
+        await group_manager.update_group_from_chat(message.chat, deferred=True)
+        await group_manager.add_member(message.chat.id, message.from_user.id, deferred=True)
     else:
-        await user_manager.update_from_chat(message.chat)
-    await user_manager.update_from_user(message.from_user)
+        await user_manager.update_from_chat(message.chat, deferred=True)
+    await user_manager.update_from_user(message.from_user, deferred=True)
     raise SkipHandler
 
 
@@ -1,7 +1,8 @@
-from yakusoku.module import ModuleConfig
+from yakusoku.module import ModuleConfig, ModulePriority
 
 __module_config__ = ModuleConfig(
     name="slash",
     description="'/'",
     commands={},
+    priority=ModulePriority.PASSIVE,
 )
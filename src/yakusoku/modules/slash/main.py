@@ -2,7 +2,6 @@ import html
 import random
 import re
 
-from aiogram import F
 from aiogram.dispatcher.event.bases import SkipHandler
 from aiogram.filters import Command, CommandObject
 from aiogram.types import Message
@@ -11,6 +10,7 @@ from yakusoku.archive import user_manager
 from yakusoku.archive import utils as archive_utils
 from yakusoku.archive.models import UserData
 from yakusoku.context import module_manager
+from yakusoku.prefilter import Prefilter
 from yakusoku.utils import chat, exception
 
 from . import process
@@ -25,7 +25,7 @@ PATTERN = re.compile(
 FALLBACK_PRPR_VERBS = ["贴了贴", "prpr 了", "ペロペロ了", "舔了"]
 
 
-@router.message(F.text.startswith("/"))
+@router.message(Prefilter("slash"))
 async def slash(message: Message):
     if not message.text or "\n" in (text := message.text.strip()):
         raise SkipHandler
@@ -1,8 +1,9 @@
-from yakusoku.module import ModuleConfig
+from yakusoku.module import ModuleConfig, ModulePriority
 
 __module_config__ = ModuleConfig(
     name="start",
     description="yakusoku, 启动!",
     commands={"start": "yakusoku!"},
     can_disable=False,
+    priority=ModulePriority.ESSENTIAL,
 )
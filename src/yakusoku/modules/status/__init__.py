@@ -1,8 +1,9 @@
-from yakusoku.module import ModuleConfig
+from yakusoku.module import ModuleConfig, ModulePriority
 
 __module_config__ = ModuleConfig(
     name="status",
     description="状态",
     commands={"status": "查看 Bot 状态"},
     can_disable=False,
+    priority=ModulePriority.ESSENTIAL,
 )
@@ -10,12 +10,24 @@ import psutil
 from aiogram.enums import ChatType
 from aiogram.filters import Command
 from aiogram.types import Message
+from sqlalchemy import QueuePool
 
 from yakusoku import environ
-from yakusoku.archive import group_manager, user_manager
-from yakusoku.context import module_manager, sql
+from yakusoku.archive import archive_buffer, group_manager, user_manager
+from yakusoku.breaker import CircuitState
+from yakusoku.context import (
+    http_cache,
+    http_client,
+    load_shedder,
+    module_manager,
+    outbound,
+    sql,
+    update_shards,
+)
 from yakusoku.dot.switch import switch_manager
 from yakusoku.utils import exception
+from yakusoku.utils.lock import lease_locks
+from yakusoku.utils.scheduler import expiry_scheduler
 
 router = module_manager.create_router()
 
@@ -45,17 +57,92 @@ async def status(message: Message):
     enabled_module_count = module_count = len(module_manager.loaded_modules)
 
     if message.chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
-        for module in module_manager.loaded_modules.values():
-            config = await switch_manager.get_switch_config(message.chat.id, module.config)
-            enabled_module_count -= not config.enabled
+        configs = await switch_manager.get_switch_configs(
+            message.chat.id, (module.config for module in module_manager.loaded_modules.values())
+        )
+        enabled_module_count -= sum(not config.enabled for config in configs)
 
-    database_size = os.path.getsize(sql.path)
+    database_size = sum(
+        os.path.getsize(path) for path in (sql.path, f"{sql.path}-wal") if os.path.exists(path)
+    )
+    pool = sql.engine.pool
+    pool_info = (
+        f"使用中 {pool.checkedout()} 个 / 容量 {pool.size()} 个"
+        if isinstance(pool, QueuePool)
+        else pool.status()
+    )
+    database_pragmas = ", ".join(
+        f"{name}={value}" for name, value in (await sql.get_pragmas()).items()
+    )
+
+    shard_info = (
+        f"{update_shards.pending}({update_shards.peak})/{update_shards.processed}"
+        f" (排队(峰值)/已处理), 活跃会话 {update_shards.active_chats} 个"
+        if update_shards.config.enabled
+        else "未启用"
+    )
+
+    outbound_info = ", ".join(
+        f"{priority.name.lower()} 平均 {stats.average:.2f}s / 最长 {stats.max:.2f}s"
+        for priority, stats in outbound.stats.items()
+    )
+
+    http_cache_size = await http_cache.get_size()
+    http_cache_info = (
+        ", ".join(
+            f"{module} {stats.hit_ratio * 100:.1f}%" for module, stats in http_cache.stats.items()
+        )
+        or "暂无请求"
+    )
+
+    breakers = http_client.breakers.values()
+    broken_upstreams = ", ".join(
+        f"{breaker.upstream} {breaker.state.value} (拒绝 {breaker.rejected} 次)"
+        for breaker in breakers
+        if breaker.state != CircuitState.CLOSED
+    )
+    breaker_info = (
+        f"正常 {sum(breaker.state == CircuitState.CLOSED for breaker in breakers)} 个"
+        f", 对冲请求 {sum(breaker.hedged for breaker in breakers)} 次"
+        + (f", 熔断: {broken_upstreams}" if broken_upstreams else "")
+    )
+
+    shed_info = f"等级 {load_shedder.level}" + (
+        ", 已跳过: "
+        + ", ".join(f"{module} {count} 次" for module, count in load_shedder.shed.items())
+        if load_shedder.shed
+        else ""
+    )
+
+    lock_info = (
+        ", ".join(
+            f"{name} 持有 {len(lock)} 个 (获取 {lock.acquired} / 争用 {lock.contended}"
+            f" / 过期 {lock.expired})"
+            for name, lock in lease_locks.items()
+        )
+        or "暂无"
+    )
 
     service_info = (
         f"- 模块: 已启用 {enabled_module_count} 个 / 共 {module_count} 个\n"
         f"- 群组数: {group_count}\n"
         f"- 用户信息缓存数: {user_count}\n"
-        f"- 数据库大小: {humanize.naturalsize(database_size)}"
+        f"- 数据库大小: {humanize.naturalsize(database_size)}\n"
+        f"- 数据库配置: {database_pragmas}\n"
+        f"- 数据库连接池: {pool_info}\n"
+        f"- 待写入记录: {archive_buffer.pending} 条\n"
+        f"- 用户缓存: {len(user_manager.cache)} 条"
+        f" (命中 {user_manager.cache.hits} / 未命中 {user_manager.cache.misses})\n"
+        f"- 群组缓存: {len(group_manager.cache)} 条"
+        f" (命中 {group_manager.cache.hits} / 未命中 {group_manager.cache.misses})\n"
+        f"- 待过期任务: {expiry_scheduler.pending} 个\n"
+        f"- 更新分片: {shard_info}\n"
+        f"- 发送等待: {outbound_info}\n"
+        f"- 限流重试: {outbound.retries} 次, 合并动作: {outbound.coalesced} 个\n"
+        f"- HTTP 缓存: {humanize.naturalsize(http_cache_size)} (命中率 {http_cache_info})\n"
+        f"- 上游状态: {breaker_info}\n"
+        f"- 过载降级: {shed_info}\n"
+        f"- 租约锁: {lock_info}"
     )
 
     system = f"{platform.system()} {platform.processor()} {platform.release()}"
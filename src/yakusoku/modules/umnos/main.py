@@ -1,14 +1,15 @@
+import json
 import random
 import traceback
+from datetime import timedelta
 from typing import Any
 
-import aiohttp
 from aiogram.filters import Command
 from aiogram.filters.callback_data import CallbackData, CallbackQueryFilter
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
 from yakusoku.config import Config
-from yakusoku.context import module_manager
+from yakusoku.context import http_cache, module_manager
 from yakusoku.utils import chat
 
 COUNTRIES_DATA_URL = (
@@ -59,11 +60,8 @@ async def get_countries() -> list[str]:
     if countries:
         return countries
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(COUNTRIES_DATA_URL) as response:
-                countries = [
-                    country["chinese"] for country in await response.json(content_type=None)
-                ]
+        data = await http_cache.fetch("umnos", COUNTRIES_DATA_URL, timedelta(days=1))
+        countries = [country["chinese"] for country in json.loads(data)]
     except Exception:
         traceback.print_exc()
         return (
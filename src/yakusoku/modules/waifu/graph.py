@@ -9,14 +9,16 @@ from yakusoku.archive import avatar_manager, file_cache_manager, user_manager
 
 async def render(bot: Bot, mapping: dict[int, int], format: str | None = None) -> bytes:
     graph = Digraph()
-    for member in set(mapping.keys()).union(mapping.values()):
+    members = set(mapping.keys()).union(mapping.values())
+    users = {user.id: user for user in await user_manager.get_users_by_ids(members)}
+    for member in members:
         avatar = None
-        user = await user_manager.get_user(member)
-        label = textwrap.shorten(
-            user.name or (f"@{next(iter(user.usernames))}" if user.usernames else str(member)),
-            width=15,
-            placeholder="...",
+        name = (
+            (user.name or (f"@{next(iter(user.usernames))}" if user.usernames else None))
+            if (user := users.get(member))
+            else None
         )
+        label = textwrap.shorten(name or str(member), width=15, placeholder="...")
         with contextlib.suppress(Exception):
             avatar = await avatar_manager.get_avatar_file(bot, member)
         if avatar:
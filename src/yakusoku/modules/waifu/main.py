@@ -4,6 +4,7 @@ import time
 import traceback
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Any
 
 from aiogram import Bot
 from aiogram.dispatcher.event.bases import SkipHandler
@@ -26,9 +27,10 @@ from yakusoku.archive.exceptions import ChatDeleted, ChatNotFound
 from yakusoku.archive.models import UserData
 from yakusoku.context import common_config, module_manager, sql
 from yakusoku.filters import GroupFilter, ManagerFilter, NonAnonymousFilter
+from yakusoku.tasks import task_store
 from yakusoku.utils import chat, exception
-from yakusoku.utils.callback import CallbackQueryTaskManager
-from yakusoku.utils.lock import SimpleLockManager
+from yakusoku.utils.callback import CallbackQueryTaskManager, DisposedCallback, UserCallback
+from yakusoku.utils.lock import LeaseLockManager
 
 from . import graph
 from .manager import (
@@ -45,9 +47,9 @@ router = module_manager.create_router()
 
 _manager = WaifuManager(sql)
 _registry = Registry(_manager)
-_tasks = CallbackQueryTaskManager(router, "waifu_task/", "任务不见力 QwQ")
-_registry_lock = SimpleLockManager()
-_graph_lock = SimpleLockManager()
+_tasks = CallbackQueryTaskManager(router, "waifu_task/", "任务不见力 QwQ", task_store)
+_registry_lock = LeaseLockManager(timedelta(days=1, minutes=1), "waifu.registry")
+_graph_lock = LeaseLockManager(timedelta(minutes=5), "waifu.graph")
 
 
 @dataclass(frozen=True)
@@ -167,9 +169,19 @@ async def waifu_rarity_get(message: Message):
     await message.reply(f"{archive_utils.user_mention_html(waifu)} 的老婆稀有度为: {data.rarity}")
 
 
-def create_divorce_task_unchecked(
-    chat: int, originator: UserData, target: UserData
-) -> InlineKeyboardMarkup:
+async def _load_participants(payload: dict[str, Any]) -> tuple[int, UserData, UserData]:
+    return (
+        payload["chat"],
+        await user_manager.get_user(payload["originator"]),
+        await user_manager.get_user(payload["target"]),
+    )
+
+
+async def _divorce_task(payload: dict[str, Any]) -> tuple[UserCallback, DisposedCallback]:
+    chat, originator, target = await _load_participants(payload)
+    # locks are lost on restarts, so take them again when the task is restored.
+    token = _registry_lock.lock_all_unchecked((chat, originator.id), (chat, target.id))
+
     async def divorce(query: CallbackQuery):
         if not isinstance(query.message, Message):
             return await query.answer("消息太远古了, 我不是考古学家w")
@@ -188,6 +200,15 @@ def create_divorce_task_unchecked(
         with contextlib.suppress(Exception):
             await query.message.delete()
 
+    async def disposed():
+        _registry_lock.unlock_all_unchecked((chat, originator.id), (chat, target.id), token=token)
+
+    return divorce, disposed
+
+
+async def _divorce_cancellation_task(payload: dict[str, Any]) -> tuple[UserCallback, None]:
+    _, originator, target = await _load_participants(payload)
+
     async def cancelled(query: CallbackQuery):
         if not isinstance(query.message, Message):
             return await query.answer("消息太远古了, 我不是考古学家w")
@@ -204,11 +225,21 @@ def create_divorce_task_unchecked(
         with contextlib.suppress(Exception):
             await query.message.delete()
 
-    async def disposed():
-        _registry_lock.unlock_all_unchecked((chat, originator.id), (chat, target.id))
+    return cancelled, None
+
+
+_tasks.register_task_factory("divorce", _divorce_task)
+_tasks.register_task_factory("divorce_cancellation", _divorce_cancellation_task)
 
-    task = _tasks.create_task(divorce, expired_after=timedelta(days=1), disposed=disposed)
-    cancellation_task = _tasks.create_cancellation_task(task, cancelled)
+
+async def create_divorce_task_unchecked(
+    chat: int, originator: UserData, target: UserData
+) -> InlineKeyboardMarkup:
+    payload = {"chat": chat, "originator": originator.id, "target": target.id}
+    task = await _tasks.create_persistent_task("divorce", payload, expired_after=timedelta(days=1))
+    cancellation_task = await _tasks.create_persistent_cancellation_task(
+        task, "divorce_cancellation", payload
+    )
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
@@ -236,16 +267,17 @@ async def divorce(message: Message):
     target = await user_manager.get_user(partner)
     if not _registry_lock.lock_all((message.chat.id, originator.id), (message.chat.id, target.id)):
         return await message.reply("你或者对方正在处理某些事项哦~")
-    buttons = create_divorce_task_unchecked(message.chat.id, originator, target)
+    buttons = await create_divorce_task_unchecked(message.chat.id, originator, target)
     await message.reply(
         f"你向 {archive_utils.user_mention_html(target)} 发起了离婚申请 www",
         reply_markup=buttons,
     )
 
 
-def create_proposal_task_unchecked(
-    chat: int, originator: UserData, target: UserData
-) -> InlineKeyboardMarkup:
+async def _proposal_task(payload: dict[str, Any]) -> tuple[UserCallback, DisposedCallback]:
+    chat, originator, target = await _load_participants(payload)
+    token = _registry_lock.lock_all_unchecked((chat, originator.id), (chat, target.id))
+
     async def marry(query: CallbackQuery):
         if not isinstance(query.message, Message):
             return await query.answer("消息太远古了, 我不是考古学家w")
@@ -265,6 +297,15 @@ def create_proposal_task_unchecked(
         with contextlib.suppress(Exception):
             await query.message.delete()
 
+    async def disposed():
+        _registry_lock.unlock_all_unchecked((chat, originator.id), (chat, target.id), token=token)
+
+    return marry, disposed
+
+
+async def _proposal_cancellation_task(payload: dict[str, Any]) -> tuple[UserCallback, None]:
+    _, originator, target = await _load_participants(payload)
+
     async def cancelled(query: CallbackQuery):
         if not isinstance(query.message, Message):
             return await query.answer("消息太远古了, 我不是考古学家w")
@@ -282,11 +323,21 @@ def create_proposal_task_unchecked(
         with contextlib.suppress(Exception):
             await query.message.delete()
 
-    async def disposed():
-        _registry_lock.unlock_all_unchecked((chat, originator.id), (chat, target.id))
+    return cancelled, None
 
-    task = _tasks.create_task(marry, expired_after=timedelta(days=1), disposed=disposed)
-    cancellation_task = _tasks.create_cancellation_task(task, cancelled)
+
+_tasks.register_task_factory("proposal", _proposal_task)
+_tasks.register_task_factory("proposal_cancellation", _proposal_cancellation_task)
+
+
+async def create_proposal_task_unchecked(
+    chat: int, originator: UserData, target: UserData
+) -> InlineKeyboardMarkup:
+    payload = {"chat": chat, "originator": originator.id, "target": target.id}
+    task = await _tasks.create_persistent_task("proposal", payload, expired_after=timedelta(days=1))
+    cancellation_task = await _tasks.create_persistent_cancellation_task(
+        task, "proposal_cancellation", payload
+    )
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
@@ -337,7 +388,7 @@ async def propose(message: Message):
         return await message.reply("你或者对方正在处理某些事项哦~")
 
     originator = await user_manager.get_user(user_id)
-    buttons = create_proposal_task_unchecked(message.chat.id, originator, target)
+    buttons = await create_proposal_task_unchecked(message.chat.id, originator, target)
     await message.reply(
         f"你向 {archive_utils.user_mention_html(target)} 发起了求婚邀请",
         reply_markup=buttons,
@@ -361,7 +412,7 @@ async def propose_callback(query: CallbackQuery, callback_data: Propose):  # typ
         (query.message.chat.id, originator.id), (query.message.chat.id, target.id)
     ):
         return await query.answer("你或者对方正在处理某些事项哦~")
-    buttons = create_proposal_task_unchecked(query.message.chat.id, originator, target)
+    buttons = await create_proposal_task_unchecked(query.message.chat.id, originator, target)
     await query.message.reply(
         f"{chat.mention_html(query.from_user)} "
         f"向 {archive_utils.user_mention_html(target)} 发起了求婚邀请",
@@ -387,20 +438,22 @@ async def mention_global(message: Message):
 @router.message(Command("waifug", "waifu_graph"), GroupFilter)
 async def waifu_graph(message: Message, bot: Bot):
     assert message.chat
-    if not _graph_lock.lock(message.chat.id):
+    if not (token := _graph_lock.lock(message.chat.id)):
         return await message.reply("呜呜呜, 别骂了, 别骂了, 在画了www")
-    reply = await message.reply_sticker(common_config.writing_sticker)
-    await bot.send_chat_action(message.chat.id, ChatAction.TYPING)
     try:
-        datas = await _manager.get_active_waifu_datas(message.chat.id)
-        waifu_dict = {data.member: data.waifu for data in datas if data.waifu}
-        image = await graph.render(bot, waifu_dict, "png")
-        file = BufferedInputFile(image, f"waifug-{message.chat.id}-{time.time()}.png")
-        await message.reply_photo(file)
-    except Exception as ex:
-        await message.reply(f"喵呜……渲染失败捏. {html.escape(str(ex))}")
-        traceback.print_exc()
-    _graph_lock.unlock(message.chat.id)
+        reply = await message.reply_sticker(common_config.writing_sticker)
+        await bot.send_chat_action(message.chat.id, ChatAction.TYPING)
+        try:
+            datas = await _manager.get_active_waifu_datas(message.chat.id)
+            waifu_dict = {data.member: data.waifu for data in datas if data.waifu}
+            image = await graph.render(bot, waifu_dict, "png")
+            file = BufferedInputFile(image, f"waifug-{message.chat.id}-{time.time()}.png")
+            await message.reply_photo(file)
+        except Exception as ex:
+            await message.reply(f"喵呜……渲染失败捏. {html.escape(str(ex))}")
+            traceback.print_exc()
+    finally:
+        _graph_lock.unlock(message.chat.id, token)
     await reply.delete()
 
 
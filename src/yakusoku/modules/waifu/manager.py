@@ -1,3 +1,5 @@
+import bisect
+import itertools
 import random
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -5,11 +7,12 @@ from enum import Enum, auto
 
 import sqlmodel
 
-from yakusoku.archive import utils as archive_utils
+from yakusoku.archive import group_manager
+from yakusoku.archive.models import GroupMemberData, UserData
 from yakusoku.database import SQLSessionManager
 
 from .config import config
-from .models import WAIFU_MAX_RARITY, WaifuConfig, WaifuData
+from .models import WAIFU_DEFAULT_RARITY, WAIFU_MAX_RARITY, WaifuConfig, WaifuData
 
 
 class WaifuFetchState(Enum):
@@ -32,11 +35,55 @@ class NoChoosableWaifuError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class _WeightTable:
+    revision: int
+    members: list[int]
+    weights: list[int]
+    cum_weights: list[int]
+    indexes: dict[int, int]
+
+    @staticmethod
+    def create(revision: int, weights: dict[int, int]) -> "_WeightTable":
+        members = list(weights.keys())
+        return _WeightTable(
+            revision,
+            members,
+            list(weights.values()),
+            list(itertools.accumulate(weights.values())),
+            {member: index for index, member in enumerate(members)},
+        )
+
+    def choose(self, exclude: int) -> int:
+        # the excluded member's weight range is skipped instead of rebuilding the table.
+        excluded, offset = 0, 0
+        if (index := self.indexes.get(exclude)) is not None:
+            excluded = self.weights[index]
+            offset = self.cum_weights[index] - excluded
+        if len(self.members) - (index is not None) <= 0:
+            raise MemberNotSufficientError
+        if (total := (self.cum_weights[-1] - excluded)) <= 0:
+            raise NoChoosableWaifuError
+        point = random.randrange(total)
+        if point >= offset:
+            point += excluded
+        return self.members[bisect.bisect_right(self.cum_weights, point)]
+
+
 class WaifuManager:
     sql: SQLSessionManager
+    _weights: dict[int, _WeightTable]
+    # bumped after waifu data of the group is written, so that loads started before are dropped.
+    _generations: dict[int, int]
 
     def __init__(self, sql: SQLSessionManager) -> None:
         self.sql = sql
+        self._weights = {}
+        self._generations = {}
+
+    def _invalidate_weights(self, group: int) -> None:
+        self._weights.pop(group, None)
+        self._generations[group] = self._generations.get(group, 0) + 1
 
     async def get_waifu_data(self, group: int, member: int) -> WaifuData:
         async with self.sql.session() as session:
@@ -56,12 +103,16 @@ class WaifuManager:
             results = await session.execute(statement)
             return row[0] if (row := results.one_or_none()) else WaifuConfig(user=user)
 
-    async def update_waifu_data(self, data: WaifuData) -> None:
+    async def _save_waifu_data(self, data: WaifuData) -> None:
         async with self.sql.session() as session:
             session.add(data)
             await session.commit()
             await session.refresh(data)
 
+    async def update_waifu_data(self, data: WaifuData) -> None:
+        await self._save_waifu_data(data)
+        self._invalidate_weights(data.group)
+
     async def update_waifu_config(self, config: WaifuConfig) -> None:
         async with self.sql.session() as session:
             session.add(config)
@@ -71,19 +122,49 @@ class WaifuManager:
     async def _is_choosable(self, data: WaifuData) -> bool:
         return data.rarity < WAIFU_MAX_RARITY and not data.restricted
 
+    @staticmethod
+    def _get_weight(rarity: int | None, restricted: bool | None) -> int:
+        # members without waifu data are weighted with the defaults.
+        rarity = WAIFU_DEFAULT_RARITY if rarity is None else rarity
+        return 0 if restricted or rarity >= WAIFU_MAX_RARITY else WAIFU_MAX_RARITY - rarity
+
+    async def _load_weights(self, group: int) -> _WeightTable:
+        revision = group_manager.members_revision(group)
+        async with self.sql.session() as session:
+            statement = (
+                sqlmodel.select(GroupMemberData.member, WaifuData.rarity, WaifuData.restricted)
+                .join(UserData, UserData.id == GroupMemberData.member)  # type: ignore
+                .outerjoin(
+                    WaifuData,
+                    (WaifuData.group == GroupMemberData.group)  # type: ignore
+                    & (WaifuData.member == GroupMemberData.member),
+                )
+                .where(GroupMemberData.group == group)
+                .where(UserData.is_bot == False)  # noqa: E712
+            )
+            results = await session.execute(statement)
+            weights = {
+                member: self._get_weight(rarity, restricted)
+                for member, rarity, restricted in results.all()
+            }
+        return _WeightTable.create(revision, weights)
+
+    async def _get_weights(self, group: int) -> _WeightTable:
+        while not (
+            (table := self._weights.get(group))
+            and table.revision == group_manager.members_revision(group)
+        ):
+            generation = self._generations.get(group, 0)
+            table = await self._load_weights(group)
+            # the rows may be stale if waifu data was written while querying, so query again.
+            if self._generations.get(group, 0) == generation:
+                self._weights[group] = table
+                return table
+        return table
+
     async def _random_waifu(self, group: int, member: int) -> int:
-        waifus = {
-            waifu.id: data.get_weight()
-            async for waifu in await archive_utils.get_user_members(group)
-            if member != waifu.id
-            and await self._is_choosable(data := await self.get_waifu_data(group, waifu.id))
-        }
-        try:
-            return random.choices(list(waifus.keys()), list(waifus.values()), k=1)[0]
-        except IndexError:
-            raise MemberNotSufficientError
-        except ValueError:
-            raise NoChoosableWaifuError
+        table = await self._get_weights(group)
+        return table.choose(member)
 
     def _last_reset_time(self, query: datetime) -> datetime:
         return datetime.combine(
@@ -102,7 +183,8 @@ class WaifuManager:
         data = await self.get_waifu_data(group, member)
         data.waifu = waifu
         data.modified = datetime.now()
-        await self.update_waifu_data(data)
+        # drawing a waifu doesn't change the weights.
+        await self._save_waifu_data(data)
 
     async def fetch_waifu(self, group: int, member: int, force: bool = False) -> WaifuFetchResult:
         data = await self.get_waifu_data(group, member)
@@ -135,6 +217,7 @@ class WaifuManager:
             results = await session.execute(statement)
             await session.delete(results.one()[0])
             await session.commit()
+        self._invalidate_weights(group)
 
     async def remove_group(self, group: int) -> None:
         async with self.sql.session() as session:
@@ -143,3 +226,4 @@ class WaifuManager:
             for row in results.all():
                 await session.delete(row)
             await session.commit()
+        self._invalidate_weights(group)
@@ -4,4 +4,5 @@ __module_config__ = ModuleConfig(
     name="whois",
     description="Whois 查询",
     commands={"whois": "Whois 查询"},
+    lazy=True,
 )
@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from yakusoku import environ
+from yakusoku.configs import MonitorConfig
+
+# frames kept for a slow callback, counting from the innermost one.
+_MAX_STACK_DEPTH = 24
+
+
+@dataclass
+class SlowCallback:
+    time: datetime
+    duration: float
+    module: str | None
+    stack: list[str]
+
+
+def _resolve_module(stack: list[traceback.FrameSummary]) -> str | None:
+    # the innermost frame in a module is the one to blame.
+    for frame in reversed(stack):
+        try:
+            return Path(frame.filename).relative_to(environ.module_path).parts[0]
+        except ValueError:
+            continue
+    return None
+
+
+class LoopMonitor:
+    config: MonitorConfig
+    lag: float
+    max_lag: float
+    samples: deque[float]
+    slow_callbacks: deque[SlowCallback]
+    _beat: float
+    _task: asyncio.Task[None] | None
+    _thread: threading.Thread | None
+    _stop: threading.Event
+    _loop_thread: int
+
+    def __init__(self, config: MonitorConfig) -> None:
+        self.config = config
+        self.lag = 0
+        self.max_lag = 0
+        self.samples = deque(maxlen=config.samples)
+        self.slow_callbacks = deque(maxlen=config.max_slow_callbacks)
+        self._beat = time.monotonic()
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._loop_thread = 0
+
+    def percentile(self, percentile: float) -> float:
+        if not self.samples:
+            return 0
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+    async def _sample(self) -> None:
+        interval = self.config.interval.total_seconds()
+        while True:
+            start = self._beat = time.monotonic()
+            await asyncio.sleep(interval)
+            # the time overslept is how long the loop was busy with other callbacks.
+            self.lag = max(0, time.monotonic() - start - interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.samples.append(self.lag)
+
+    def _watch(self, threshold: float) -> None:
+        interval = self.config.interval.total_seconds()
+        record: SlowCallback | None = None
+        while not self._stop.wait(min(threshold, interval) / 2):
+            # the sampler beats every interval, unless a callback is blocking the loop.
+            stalled = time.monotonic() - self._beat - interval
+            if stalled < threshold:
+                record = None
+                continue
+            if record:
+                record.duration = stalled
+                continue
+            # it is the only way to get the frame of another thread, and cpython keeps it stable.
+            frames = sys._current_frames()  # pyright: ignore[reportPrivateUsage]
+            if not (frame := frames.get(self._loop_thread)):
+                continue
+            stack = traceback.extract_stack(frame)[-_MAX_STACK_DEPTH:]
+            record = SlowCallback(
+                datetime.now(), stalled, _resolve_module(stack), traceback.format_list(stack)
+            )
+            self.slow_callbacks.append(record)
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.create_task(self._sample())
+        if threshold := self.config.slow_callback_threshold:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._watch, args=(threshold.total_seconds(),), daemon=True
+            )
+            self._thread.start()
+
+    async def close(self) -> None:
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -0,0 +1,221 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Generator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, SendChatAction, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from yakusoku.configs import RateLimitConfig
+
+# methods which post something to a chat and count towards the flood limits.
+_LIMITED_METHOD_PREFIXES = ("Send", "Edit", "Copy", "Forward")
+
+# idle buckets are pruned once the number of them reaches it, or twice the busy ones left by
+# the last pruning, so that the pruning is amortized when most of the buckets are busy.
+_MAX_IDLE_BUCKETS = 1024
+
+logger = logging.getLogger()
+
+
+class SendPriority(IntEnum):
+    COMMAND = 0
+    PASSIVE = 1
+    ACTION = 2
+
+
+_send_priority: ContextVar[SendPriority] = ContextVar("send_priority", default=SendPriority.COMMAND)
+
+
+@contextlib.contextmanager
+def send_priority(priority: SendPriority) -> Generator[None, None, None]:
+    token = _send_priority.set(priority)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class TokenBucket:
+    rate: float
+    burst: int
+    tokens: float
+    _updated: float
+    _counter: "itertools.count[int]"
+    _waiters: list[tuple[int, int, asyncio.Future[None]]]
+    _timer: asyncio.TimerHandle | None
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+        self._counter = itertools.count()
+        self._waiters = []
+        self._timer = None
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return not self._waiters and self.tokens >= self.burst
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _schedule(self) -> None:
+        if self._timer or not self._waiters:
+            return
+        delay = max(0, (1 - self.tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        self._timer = None
+        self._refill()
+        # waiters are served by priority first, then by arrival.
+        while self._waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+    async def acquire(self, priority: int) -> None:
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._schedule()
+        await future
+
+    def block(self, seconds: float) -> None:
+        # a negative balance keeps the bucket empty until the period passes.
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._schedule()
+
+
+@dataclass
+class WaitStats:
+    count: int = 0
+    total: float = 0
+    max: float = 0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def record(self, waited: float) -> None:
+        self.count += 1
+        self.total += waited
+        self.max = max(self.max, waited)
+
+
+class OutboundMiddleware(BaseRequestMiddleware):
+    config: RateLimitConfig
+    stats: dict[SendPriority, WaitStats]
+    retries: int
+    coalesced: int
+    _global: TokenBucket | None
+    _chats: dict[int | str, TokenBucket]
+    _prune_at: int
+    _actions: dict[int | str, SendChatAction]
+
+    def __init__(self, config: RateLimitConfig) -> None:
+        self.config = config
+        self.stats = {priority: WaitStats() for priority in SendPriority}
+        self.retries = 0
+        self.coalesced = 0
+        self._global = None
+        self._chats = {}
+        self._prune_at = _MAX_IDLE_BUCKETS
+        self._actions = {}
+
+    def _get_global_bucket(self) -> TokenBucket:
+        if not self._global:
+            self._global = TokenBucket(self.config.global_rate, self.config.global_burst)
+        return self._global
+
+    def _get_chat_bucket(self, chat: int | str) -> TokenBucket:
+        if bucket := self._chats.get(chat):
+            return bucket
+        if len(self._chats) >= self._prune_at:
+            self._chats = {key: bucket for key, bucket in self._chats.items() if not bucket.idle}
+            self._prune_at = max(_MAX_IDLE_BUCKETS, len(self._chats) * 2)
+        group = isinstance(chat, str) or chat < 0
+        bucket = self._chats[chat] = (
+            TokenBucket(self.config.group_rate, self.config.group_burst)
+            if group
+            else TokenBucket(self.config.chat_rate, self.config.chat_burst)
+        )
+        return bucket
+
+    async def _acquire(self, chat: int | str, priority: SendPriority) -> None:
+        start = time.monotonic()
+        await self._get_chat_bucket(chat).acquire(priority)
+        await self._get_global_bucket().acquire(priority)
+        self.stats[priority].record(time.monotonic() - start)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat: int | str | None = getattr(method, "chat_id", None)
+        if chat is None or not type(method).__name__.startswith(_LIMITED_METHOD_PREFIXES):
+            return await make_request(bot, method)
+
+        action = isinstance(method, SendChatAction)
+        if action:
+            # only the latest action of a chat is sent, older ones are superseded.
+            if chat in self._actions:
+                self._actions[chat] = method  # type: ignore
+                self.coalesced += 1
+                return Response[Any](ok=True, result=True)  # type: ignore
+            self._actions[chat] = method  # type: ignore
+            priority = SendPriority.ACTION
+        else:
+            priority = _send_priority.get()
+
+        attempt = 0
+        try:
+            while True:
+                await self._acquire(chat, priority)
+                if action:
+                    method = self._actions.pop(chat)  # type: ignore
+                    action = False
+                try:
+                    return await make_request(bot, method)
+                except TelegramRetryAfter as ex:
+                    if attempt >= self.config.max_retries:
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    logger.warning(
+                        f"flood control exceeded in chat {chat}, retry after {ex.retry_after}s."
+                    )
+                    self._get_chat_bucket(chat).block(ex.retry_after)
+        finally:
+            # release the slot if cancelled before the action was sent.
+            if action:
+                self._actions.pop(chat, None)
@@ -0,0 +1,140 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.filters import Command, Filter
+from aiogram.types import Message, TelegramObject
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+# named patterns registered by modules, scanned along with the builtin ones.
+_patterns: dict[str, re.Pattern[str]] = {}
+_scanner: re.Pattern[str] | None = None
+
+_BUILTIN_TRAITS = ("command", "slash", "url")
+_URL_ENTITY_TYPES = ("url", "text_link")
+_URL = re.compile(r"https?://|\bwww\.")
+# tokens looking like a bot command, which are left to commands instead of slash.
+_COMMAND_TOKEN = re.compile(r"[a-zA-Z0-9_]+(?:@[a-zA-Z0-9_]+)?")
+_INLINE_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.VERBOSE: "x"}
+
+
+@dataclass(frozen=True)
+class MessageTraits:
+    command: str | None = None
+    mention: str | None = None
+    slash: bool = False
+    url: bool = False
+    matches: dict[str, list[str]] = field(default_factory=dict)
+
+    def has(self, trait: str) -> bool:
+        match trait:
+            case "command":
+                return self.command is not None
+            case "slash":
+                return self.slash
+            case "url":
+                return self.url
+            case _:
+                return bool(self.matches.get(trait))
+
+
+def register_pattern(name: str, pattern: re.Pattern[str]) -> None:
+    global _scanner
+    assert name.isidentifier() and name not in _BUILTIN_TRAITS, f"invalid trait name '{name}'."
+    assert name not in _patterns, f"pattern '{name}' already existed."
+    _patterns[name] = pattern
+    _scanner = None
+
+
+def _get_scanner() -> re.Pattern[str] | None:
+    global _scanner
+    if _scanner or not _patterns:
+        return _scanner
+    # a single alternation finds the registered patterns in one pass over the text.
+    # urls are looked for in a pass of their own, so that they never shadow a pattern matching
+    # a link.
+    parts: list[str] = []
+    for name, pattern in _patterns.items():
+        flags = "".join(letter for flag, letter in _INLINE_FLAGS.items() if pattern.flags & flag)
+        source = f"(?{flags}:{pattern.pattern})" if flags else f"(?:{pattern.pattern})"
+        parts.append(f"(?P<{name}>{source})")
+    _scanner = re.compile("|".join(parts))
+    return _scanner
+
+
+def classify(message: Message) -> MessageTraits:
+    text = message.text or message.caption
+    if not text:
+        return MessageTraits()
+
+    command = mention = None
+    slash = False
+    if text.startswith("/"):
+        token = text.split(maxsplit=1)[0][1:]
+        command, _, mention = token.partition("@")
+        mention = mention or None
+        # slash only reacts to single line text which is not a bot command.
+        stripped = text.strip()
+        slash = (
+            message.text is not None
+            and "\n" not in stripped
+            and (stripped[1:2] in ("/", "$") or not _COMMAND_TOKEN.fullmatch(token))
+        )
+
+    entities = (message.entities if message.text else message.caption_entities) or ()
+    url = any(entity.type in _URL_ENTITY_TYPES for entity in entities) or bool(_URL.search(text))
+    matches: dict[str, list[str]] = {}
+    if scanner := _get_scanner():
+        for match in scanner.finditer(text):
+            if match.lastgroup:
+                matches.setdefault(match.lastgroup, []).append(match.group())
+    return MessageTraits(command, mention, slash, url, matches)
+
+
+class PrefilterMiddleware(BaseMiddleware):
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        if isinstance(event, Message):
+            data["message_traits"] = classify(event)
+        return await handler(event, data)
+
+
+class Prefilter(Filter):
+    traits: tuple[str, ...]
+
+    def __init__(self, *traits: str) -> None:
+        self.traits = traits
+
+    async def __call__(
+        self, message: Message, message_traits: MessageTraits | None = None
+    ) -> bool | dict[str, Any]:
+        # classified in place if the middleware is not set up.
+        traits = message_traits or classify(message)
+        if not any(traits.has(trait) for trait in self.traits):
+            return False
+        return {"message_traits": traits}
+
+
+class CommandPrefilter(Filter):
+    commands: frozenset[str]
+    ignore_case: bool
+
+    def __init__(self, commands: frozenset[str], ignore_case: bool) -> None:
+        self.commands = commands
+        self.ignore_case = ignore_case
+
+    @classmethod
+    def from_command(cls, command: Command) -> "CommandPrefilter | None":
+        # only plain commands with the default prefix can be told apart by the token.
+        if command.prefix != "/" or not all(isinstance(item, str) for item in command.commands):
+            return None
+        # commands are already case folded by the filter if case is ignored.
+        return cls(frozenset(command.commands), command.ignore_case)  # type: ignore
+
+    async def __call__(self, message: Message, message_traits: MessageTraits | None = None) -> bool:
+        traits = message_traits or classify(message)
+        if traits.command is None:
+            return False
+        command = traits.command.casefold() if self.ignore_case else traits.command
+        return command in self.commands
@@ -0,0 +1,68 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, User
+
+from yakusoku.configs import ShardConfig
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class _ChatShard:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # updates running or waiting in the chat, the shard is dropped once it gets to 0.
+    users: int = 0
+
+
+class ShardedUpdateMiddleware(BaseMiddleware):
+    config: ShardConfig
+    pending: int
+    peak: int
+    processed: int
+    _chats: dict[int, _ChatShard]
+
+    @property
+    def active_chats(self) -> int:
+        return len(self._chats)
+
+    def __init__(self, config: ShardConfig) -> None:
+        self.config = config
+        self.pending = 0
+        self.peak = 0
+        self.processed = 0
+        self._chats = {}
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: dict[str, Any]) -> Any:
+        chat: Chat | None = data.get("event_chat")
+        user: User | None = data.get("event_from_user")
+        key = chat.id if chat else user.id if user else None
+        if key is None or not self.config.enabled:
+            return await handler(event, data)
+        # updates of the same chat take turns on the lock of the chat, so they run in order,
+        # while different chats run in parallel.
+        shard = self._chats.get(key) or self._chats.setdefault(key, _ChatShard())
+        shard.users += 1
+        try:
+            # the others of the chat are running or waiting ahead.
+            if shard.users > 1:
+                self.pending += 1
+                self.peak = max(self.peak, self.pending)
+                # waiters are woken in order, and a cancelled caller just leaves the line.
+                try:
+                    await shard.lock.acquire()
+                finally:
+                    self.pending -= 1
+            else:
+                await shard.lock.acquire()
+            try:
+                return await handler(event, data)
+            finally:
+                shard.lock.release()
+                self.processed += 1
+        finally:
+            shard.users -= 1
+            if not shard.users:
+                del self._chats[key]
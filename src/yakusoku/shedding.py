@@ -0,0 +1,69 @@
+import time
+from typing import Any, Callable
+
+from aiogram.filters import Filter
+
+from yakusoku.configs import SheddingConfig
+from yakusoku.module import ModuleConfig, ModulePriority
+
+
+class LoadShedder:
+    config: SheddingConfig
+    shed: dict[str, int]
+    _lag: Callable[[], float]
+    _depths: list[Callable[[], int]]
+    _level: int
+    _held_until: float
+
+    def __init__(
+        self, config: SheddingConfig, lag: Callable[[], float], *depths: Callable[[], int]
+    ) -> None:
+        self.config = config
+        self.shed = {}
+        self._lag = lag
+        self._depths = list(depths)
+        self._level = 0
+        self._held_until = 0
+
+    def add_depth_source(self, depth: Callable[[], int]) -> None:
+        self._depths.append(depth)
+
+    @property
+    def pressure(self) -> float:
+        lag = self._lag() / self.config.lag_threshold.total_seconds()
+        depth = sum(source() for source in self._depths) / self.config.queue_threshold
+        return max(lag, depth)
+
+    @property
+    def level(self) -> int:
+        if not self.config.enabled:
+            return 0
+        now = time.monotonic()
+        level = min(int(self.pressure), max(ModulePriority))
+        if level >= self._level:
+            self._level = level
+            self._held_until = now + self.config.hold.total_seconds()
+        elif now >= self._held_until:
+            self._level = level
+        return self._level
+
+    def should_shed(self, module: ModuleConfig) -> bool:
+        # level 1 sheds the passive tier, level 2 sheds the normal one as well.
+        if module.priority == ModulePriority.ESSENTIAL:
+            return False
+        if module.priority <= max(ModulePriority) - self.level:
+            return False
+        self.shed[module.name] = self.shed.get(module.name, 0) + 1
+        return True
+
+
+class ShedFilter(Filter):
+    _shedder: LoadShedder
+    _module: ModuleConfig
+
+    def __init__(self, shedder: LoadShedder, module: ModuleConfig) -> None:
+        self._shedder = shedder
+        self._module = module
+
+    async def __call__(self, _: Any) -> bool:
+        return not self._shedder.should_shed(self._module)
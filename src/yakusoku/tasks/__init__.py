@@ -0,0 +1,4 @@
+from yakusoku.context import sql
+from yakusoku.tasks.store import CallbackTaskStore
+
+task_store = CallbackTaskStore(sql)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlmodel import JSON, Column, Field, SQLModel
+
+
+class CallbackTaskData(SQLModel, table=True):
+    uuid: UUID = Field(primary_key=True)
+    prefix: str = Field(index=True)
+    kind: str
+    payload: dict[str, Any] = Field(default={}, sa_column=Column(JSON))
+    disposable: bool = True
+    expiry: datetime | None = Field(default=None, index=True)
+    cancellation_of: UUID | None = None
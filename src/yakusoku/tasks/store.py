@@ -0,0 +1,56 @@
+from datetime import datetime
+from uuid import UUID
+
+import sqlmodel
+
+from yakusoku.database import SQLSessionManager
+
+from .models import CallbackTaskData
+
+
+class CallbackTaskStore:
+    sql: SQLSessionManager
+
+    def __init__(self, sql: SQLSessionManager) -> None:
+        self.sql = sql
+
+    async def add_tasks(self, *tasks: CallbackTaskData) -> None:
+        async with self.sql.session() as session:
+            session.add_all(tasks)
+            await session.commit()
+
+    async def remove_tasks(self, *uuids: UUID) -> None:
+        async with self.sql.session() as session:
+            statement = sqlmodel.delete(CallbackTaskData).where(
+                CallbackTaskData.uuid.in_(uuids)  # type: ignore
+            )
+            await session.execute(statement)
+            await session.commit()
+
+    async def sweep_tasks(self, prefix: str, now: datetime) -> int:
+        # expired tasks are deleted with their cancellation tasks in one statement.
+        expired = (
+            sqlmodel.select(CallbackTaskData.uuid)
+            .where(CallbackTaskData.prefix == prefix)
+            .where(CallbackTaskData.expiry <= now)  # type: ignore
+        )
+        async with self.sql.session() as session:
+            statement = (
+                sqlmodel.delete(CallbackTaskData)
+                .where(CallbackTaskData.prefix == prefix)  # type: ignore
+                .where(
+                    sqlmodel.or_(
+                        CallbackTaskData.expiry <= now,  # type: ignore
+                        CallbackTaskData.cancellation_of.in_(expired),  # type: ignore
+                    )
+                )
+            )
+            results = await session.execute(statement)
+            await session.commit()
+            return results.rowcount
+
+    async def get_tasks(self, prefix: str) -> list[CallbackTaskData]:
+        async with self.sql.session() as session:
+            statement = sqlmodel.select(CallbackTaskData).where(CallbackTaskData.prefix == prefix)
+            results = await session.execute(statement)
+            return [row[0] for row in results.all()]
@@ -0,0 +1,78 @@
+import contextlib
+import time
+from collections import Counter, OrderedDict
+from datetime import timedelta
+from typing import Callable, Generator, Generic, Hashable, TypeVar
+
+_T = TypeVar("_T")
+
+
+class LRUCache(Generic[_T]):
+    maxsize: int
+    ttl: timedelta
+    hits: int
+    misses: int
+    _items: OrderedDict[Hashable, tuple[float, _T]]
+    # loads in flight by key, and the revisions bumped by invalidations made meanwhile.
+    _loads: Counter[Hashable]
+    _revisions: dict[Hashable, int]
+
+    def __init__(self, maxsize: int, ttl: timedelta) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._loads = Counter()
+        self._revisions = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> _T | None:
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: _T) -> None:
+        if self.maxsize <= 0:
+            return
+        self._items[key] = (time.monotonic() + self.ttl.total_seconds(), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+        if key in self._loads:
+            self._revisions[key] = self._revisions.get(key, 0) + 1
+
+    def clear(self) -> None:
+        self._items.clear()
+        for key in self._loads:
+            self._revisions[key] = self._revisions.get(key, 0) + 1
+
+    @contextlib.contextmanager
+    def loading(self, key: Hashable) -> Generator[Callable[[_T], None], None, None]:
+        # yields a setter, which drops the value if the key was popped since the load started,
+        # for the value may have been read before the change that popped it.
+        self._loads[key] += 1
+        revision = self._revisions.get(key, 0)
+
+        def store(value: _T) -> None:
+            if self._revisions.get(key, 0) == revision:
+                self.set(key, value)
+
+        try:
+            yield store
+        finally:
+            self._loads[key] -= 1
+            if not self._loads[key]:
+                del self._loads[key]
+                self._revisions.pop(key, None)
@@ -1,5 +1,6 @@
-import asyncio
 import contextlib
+import logging
+import traceback
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Awaitable, Callable
@@ -9,8 +10,16 @@ from aiogram import Router
 from aiogram.filters.callback_data import CallbackData, CallbackQueryFilter
 from aiogram.types import CallbackQuery
 
+from yakusoku.tasks.models import CallbackTaskData
+from yakusoku.tasks.store import CallbackTaskStore
+from yakusoku.utils.scheduler import expiry_scheduler
+
 UserCallback = Callable[[CallbackQuery], Awaitable[Any]]
 DisposedCallback = Callable[[], Awaitable[Any]]
+# a task factory rebuilds the callbacks of a persistent task from its payload.
+TaskFactory = Callable[[dict[str, Any]], Awaitable[tuple[UserCallback, DisposedCallback | None]]]
+
+logger = logging.getLogger()
 
 
 @dataclass
@@ -21,6 +30,7 @@ class CallbackQueryTask:
     callback_data: str
     expiry: datetime | None
     disposed: DisposedCallback | None = None
+    persistent: bool = False
 
 
 class _CallbackQueryTaskData(CallbackData, prefix="task"):
@@ -35,14 +45,24 @@ class CallbackQueryTaskManager:
     _tasks: dict[UUID, CallbackQueryTask]
     _cancellation_tasks: dict[UUID, CallbackQueryTask]
     _error_answer: str | None
-    _expire_tasks: list[asyncio.Task[None]]
     _callback_data: type[_CallbackQueryTaskData]
+    _prefix: str
+    _store: CallbackTaskStore | None
+    _factories: dict[str, TaskFactory]
 
-    def __init__(self, router: Router, query_prefix: str, error_answer: str | None = None) -> None:
+    def __init__(
+        self,
+        router: Router,
+        query_prefix: str,
+        error_answer: str | None = None,
+        store: CallbackTaskStore | None = None,
+    ) -> None:
         self._tasks = {}
         self._error_answer = error_answer
-        self._expire_tasks = []
         self._cancellation_tasks = {}
+        self._prefix = query_prefix
+        self._store = store
+        self._factories = {}
         self._callback_data = type(
             f"_CallbackQueryTaskData_{query_prefix}",
             (_CallbackQueryTaskData,),
@@ -53,28 +73,34 @@ class CallbackQueryTaskManager:
         router.callback_query.register(
             self._handle_callback_query_task, CallbackQueryFilter(callback_data=self._callback_data)
         )
+        if store:
+            router.startup.register(self.restore_tasks)
 
-    def create_task(
+    def register_task_factory(self, kind: str, factory: TaskFactory) -> None:
+        assert kind not in self._factories, f"task kind '{kind}' already existed."
+        self._factories[kind] = factory
+
+    def _create_task(
         self,
+        uuid: UUID,
         callback: UserCallback,
-        disposable: bool = True,
-        expired_after: timedelta | None = None,
-        disposed: DisposedCallback | None = None,
+        disposable: bool,
+        expiry: datetime | None,
+        disposed: DisposedCallback | None,
+        persistent: bool,
     ) -> CallbackQueryTask:
-        uuid = uuid1()
-
-        if expired_after:
+        if expiry:
 
             async def expirable_disposed():
-                expire_task.cancel()
-                self._expire_tasks.remove(expire_task)
+                handle.cancel()
                 if disposed:
                     await disposed()
 
             async def expire():
-                await asyncio.sleep(expired_after.total_seconds())
-                self._expire_tasks.remove(expire_task)
                 del self._tasks[uuid]
+                self._cancellation_tasks.pop(uuid, None)
+                if persistent and self._store:
+                    await self._store.remove_tasks(uuid)
                 if disposed:
                     await disposed()
 
@@ -83,32 +109,76 @@ class CallbackQueryTaskManager:
                 disposable,
                 callback,
                 self._callback_data(uuid=uuid).pack(),
-                datetime.now() + expired_after,
+                expiry,
                 expirable_disposed,
+                persistent,
             )
-            expire_task = asyncio.create_task(expire())
-            self._expire_tasks.append(expire_task)
+            handle = expiry_scheduler.schedule(expiry - datetime.now(), expire)
             return task
 
         task = self._tasks[uuid] = CallbackQueryTask(
-            uuid, disposable, callback, self._callback_data(uuid=uuid).pack(), None
+            uuid,
+            disposable,
+            callback,
+            self._callback_data(uuid=uuid).pack(),
+            None,
+            disposed,
+            persistent,
+        )
+        return task
+
+    def create_task(
+        self,
+        callback: UserCallback,
+        disposable: bool = True,
+        expired_after: timedelta | None = None,
+        disposed: DisposedCallback | None = None,
+    ) -> CallbackQueryTask:
+        expiry = datetime.now() + expired_after if expired_after else None
+        return self._create_task(uuid1(), callback, disposable, expiry, disposed, False)
+
+    async def create_persistent_task(
+        self,
+        kind: str,
+        payload: dict[str, Any],
+        disposable: bool = True,
+        expired_after: timedelta | None = None,
+    ) -> CallbackQueryTask:
+        assert self._store, "persistent tasks require a task store."
+        callback, disposed = await self._factories[kind](payload)
+        expiry = datetime.now() + expired_after if expired_after else None
+        task = self._create_task(uuid1(), callback, disposable, expiry, disposed, True)
+        await self._store.add_tasks(
+            CallbackTaskData(
+                uuid=task.uuid,
+                prefix=self._prefix,
+                kind=kind,
+                payload=payload,
+                disposable=disposable,
+                expiry=expiry,
+            )
         )
         return task
 
     async def cancel_task(self, task: CallbackQueryTask) -> None:
         with contextlib.suppress(KeyError):
             del self._tasks[task.uuid]
+        if task.persistent and self._store:
+            with contextlib.suppress(Exception):
+                await self._store.remove_tasks(task.uuid)
         if task.disposed:
             with contextlib.suppress(Exception):
                 await task.disposed()
-        if cancellation_task := self._cancellation_tasks.get(task.uuid):
+        if cancellation_task := self._cancellation_tasks.pop(task.uuid, None):
             await self.cancel_task(cancellation_task)
 
-    def create_cancellation_task(
+    def _create_cancellation_task(
         self,
+        uuid: UUID,
         task: CallbackQueryTask,
-        post_callback: UserCallback | None = None,
-        cancelled_answer: str | None = None,
+        post_callback: UserCallback | None,
+        cancelled_answer: str | None,
+        persistent: bool,
     ) -> CallbackQueryTask:
         assert task.uuid not in self._cancellation_tasks
 
@@ -118,14 +188,64 @@ class CallbackQueryTaskManager:
                 await post_callback(query)
             await query.answer(cancelled_answer)
 
-        expired_after = task.expiry - datetime.now() if task.expiry else None
-        cancellation_task = self.create_task(
-            cancel,
-            expired_after=expired_after,
-        )
+        cancellation_task = self._create_task(uuid, cancel, True, task.expiry, None, persistent)
         self._cancellation_tasks[task.uuid] = cancellation_task
         return cancellation_task
 
+    def create_cancellation_task(
+        self,
+        task: CallbackQueryTask,
+        post_callback: UserCallback | None = None,
+        cancelled_answer: str | None = None,
+    ) -> CallbackQueryTask:
+        return self._create_cancellation_task(uuid1(), task, post_callback, cancelled_answer, False)
+
+    async def create_persistent_cancellation_task(
+        self, task: CallbackQueryTask, kind: str, payload: dict[str, Any]
+    ) -> CallbackQueryTask:
+        assert self._store, "persistent tasks require a task store."
+        assert task.persistent, "cancellation of a non-persistent task cannot be persisted."
+        post_callback, _ = await self._factories[kind](payload)
+        cancellation_task = self._create_cancellation_task(uuid1(), task, post_callback, None, True)
+        await self._store.add_tasks(
+            CallbackTaskData(
+                uuid=cancellation_task.uuid,
+                prefix=self._prefix,
+                kind=kind,
+                payload=payload,
+                expiry=task.expiry,
+                cancellation_of=task.uuid,
+            )
+        )
+        return cancellation_task
+
+    async def restore_tasks(self) -> None:
+        assert self._store, "persistent tasks require a task store."
+        await self._store.sweep_tasks(self._prefix, datetime.now())
+        # cancellation tasks are restored after the tasks they cancel.
+        rows = sorted(
+            await self._store.get_tasks(self._prefix),
+            key=lambda row: row.cancellation_of is not None,
+        )
+        invalid: list[UUID] = []
+        for row in rows:
+            try:
+                callback, disposed = await self._factories[row.kind](row.payload)
+                if row.cancellation_of is None:
+                    self._create_task(
+                        row.uuid, callback, row.disposable, row.expiry, disposed, True
+                    )
+                elif task := self._tasks.get(row.cancellation_of):
+                    self._create_cancellation_task(row.uuid, task, callback, None, True)
+                else:
+                    invalid.append(row.uuid)
+            except Exception:
+                logger.error(f"failed to restore task '{row.uuid}' of kind '{row.kind}'.")
+                traceback.print_exc()
+                invalid.append(row.uuid)
+        if invalid:
+            await self._store.remove_tasks(*invalid)
+
     async def _handle_callback_query_task(
         self, query: CallbackQuery, callback_data: _CallbackQueryTaskData
     ):
@@ -1,38 +1,99 @@
+import itertools
+import time
+from datetime import timedelta
 from typing import Hashable
 
+_MIN_SWEEP_SIZE = 64
 
-class SimpleLockManager:
-    _keys: set[Hashable]
+# named lease locks, whose contention is reported in status and metrics.
+lease_locks: dict[str, "LeaseLockManager"] = {}
 
-    def __init__(self):
-        self._keys = set()
 
-    def lock(self, key: Hashable) -> bool:
-        original = len(self._keys)
-        self._keys.add(key)
-        return len(self._keys) == original + 1
+class LeaseLockManager:
+    name: str | None
+    ttl: timedelta
+    acquired: int
+    contended: int
+    expired: int
+    # leases by key, with the token of their holders, so that a holder whose lease expired
+    # cannot release the lease taken by another one since.
+    _leases: dict[Hashable, tuple[float, int]]
+    _tokens: "itertools.count[int]"
+    _sweep_size: int
 
-    def unlock(self, key: Hashable) -> bool:
-        try:
-            self._keys.remove(key)
-            return True
-        except KeyError:
-            return False
+    def __init__(self, ttl: timedelta, name: str | None = None) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.acquired = 0
+        self.contended = 0
+        self.expired = 0
+        self._leases = {}
+        # tokens start from 1, so that they are always true.
+        self._tokens = itertools.count(1)
+        self._sweep_size = _MIN_SWEEP_SIZE
+        if name:
+            assert name not in lease_locks, f"lease lock '{name}' already existed."
+            lease_locks[name] = self
 
-    def lock_all(self, *keys: Hashable) -> bool:
-        if self._keys.intersection(keys):
-            return False
-        self._keys.update(keys)
-        return True
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    def _expiry(self, ttl: timedelta | None) -> float:
+        return time.monotonic() + (ttl or self.ttl).total_seconds()
+
+    def _sweep(self) -> None:
+        # sweep lazily when the leases doubled since the last sweep, which is amortized O(1).
+        if len(self._leases) < self._sweep_size:
+            return
+        now = time.monotonic()
+        expired = [key for key, (expiry, _) in self._leases.items() if expiry <= now]
+        for key in expired:
+            del self._leases[key]
+        self.expired += len(expired)
+        self._sweep_size = max(_MIN_SWEEP_SIZE, len(self._leases) * 2)
+
+    def _holder(self, key: Hashable, now: float) -> int | None:
+        lease = self._leases.get(key)
+        if lease is None:
+            return None
+        expiry, token = lease
+        if expiry > now:
+            return token
+        del self._leases[key]
+        self.expired += 1
+        return None
+
+    def lock(self, key: Hashable, ttl: timedelta | None = None) -> int | None:
+        return self.lock_all(key, ttl=ttl)
+
+    def unlock(self, key: Hashable, token: int) -> bool:
+        return self.unlock_all(key, token=token)
+
+    def lock_all(self, *keys: Hashable, ttl: timedelta | None = None) -> int | None:
+        now = time.monotonic()
+        if any(self._holder(key, now) is not None for key in keys):
+            self.contended += 1
+            return None
+        return self.lock_all_unchecked(*keys, ttl=ttl)
 
-    def lock_all_unchecked(self, *keys: Hashable) -> None:
-        self._keys.update(keys)
+    def lock_all_unchecked(self, *keys: Hashable, ttl: timedelta | None = None) -> int:
+        self._sweep()
+        expiry = self._expiry(ttl)
+        token = next(self._tokens)
+        for key in keys:
+            self._leases[key] = (expiry, token)
+        self.acquired += 1
+        return token
 
-    def unlock_all(self, *keys: Hashable) -> bool:
-        if len(self._keys.intersection(keys)) < len(keys):
+    def unlock_all(self, *keys: Hashable, token: int) -> bool:
+        now = time.monotonic()
+        if not all(self._holder(key, now) == token for key in keys):
             return False
-        self._keys.difference_update(keys)
+        self.unlock_all_unchecked(*keys, token=token)
         return True
 
-    def unlock_all_unchecked(self, *keys: Hashable) -> None:
-        self._keys.difference_update(keys)
+    def unlock_all_unchecked(self, *keys: Hashable, token: int) -> None:
+        # releases what is still held with the token, even if some of the leases were lost.
+        for key in keys:
+            if (lease := self._leases.get(key)) and lease[1] == token:
+                del self._leases[key]
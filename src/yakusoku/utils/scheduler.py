@@ -0,0 +1,102 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import traceback
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+ScheduledCallback = Callable[[], Awaitable[Any]]
+
+logger = logging.getLogger()
+
+
+class ScheduledHandle:
+    when: float
+    callback: ScheduledCallback
+    cancelled: bool
+    _scheduler: "ExpiryScheduler"
+
+    def __init__(self, scheduler: "ExpiryScheduler", when: float, callback: ScheduledCallback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+        self._scheduler = scheduler
+
+    def cancel(self) -> None:
+        self._scheduler.cancel(self)
+
+
+class ExpiryScheduler:
+    _heap: list[tuple[float, int, ScheduledHandle]]
+    _counter: "itertools.count[int]"
+    _pending: int
+    _wakeup: asyncio.Event
+    _task: asyncio.Task[None] | None
+    _running: set[asyncio.Task[Any]]
+
+    def __init__(self) -> None:
+        self._heap = []
+        self._counter = itertools.count()
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def schedule(self, delay: timedelta, callback: ScheduledCallback) -> ScheduledHandle:
+        loop = asyncio.get_running_loop()
+        handle = ScheduledHandle(self, loop.time() + delay.total_seconds(), callback)
+        heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+        self._pending += 1
+        if self._heap[0][2] is handle:
+            self._wakeup.set()
+        if not self._task:
+            self._task = loop.create_task(self._run())
+        return handle
+
+    def cancel(self, handle: ScheduledHandle) -> None:
+        if handle.cancelled:
+            return
+        # cancelled entries are dropped lazily, and the heap is compacted
+        # once they make up most of it.
+        handle.cancelled = True
+        self._pending -= 1
+        if len(self._heap) > 64 and self._pending < len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+
+    def _pop_cancelled(self) -> None:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    async def _call(self, handle: ScheduledHandle) -> None:
+        try:
+            await handle.callback()
+        except Exception:
+            logger.error(f"failed to run scheduled callback '{handle.callback}'.")
+            traceback.print_exc()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pop_cancelled()
+            timeout = self._heap[0][0] - loop.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                self._wakeup.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue
+            _, _, handle = heapq.heappop(self._heap)
+            handle.cancelled = True
+            self._pending -= 1
+            task = loop.create_task(self._call(handle))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+import hmac
+import logging
+import signal
+import traceback
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+from yakusoku.configs import WebhookConfig
+
+_SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+logger = logging.getLogger()
+
+
+class WebhookServer:
+    dispatcher: Dispatcher
+    bot: Bot
+    config: WebhookConfig
+    dropped: int
+    rejected: int
+    _queue: asyncio.Queue[Update]
+    _workflow_data: dict[str, Any]
+    _stop: asyncio.Event
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, config: WebhookConfig) -> None:
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.config = config
+        self.dropped = 0
+        self.rejected = 0
+        self._queue = asyncio.Queue(config.queue_size)
+        self._workflow_data = {"dispatcher": dispatcher, "bots": [bot], **dispatcher.workflow_data}
+        self._workflow_data.pop("bot", None)
+        self._stop = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        # compared in constant time, so that the token cannot be guessed from response times.
+        if self.config.secret_token and not hmac.compare_digest(
+            request.headers.get(_SECRET_TOKEN_HEADER, "").encode(),
+            self.config.secret_token.encode(),
+        ):
+            return web.Response(status=401)
+        update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        # acknowledge as soon as the update is queued, handlers run in workers.
+        match self.config.backpressure:
+            case "block":
+                await self._queue.put(update)
+            case "drop":
+                try:
+                    self._queue.put_nowait(update)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+                    logger.warning(f"update {update.update_id} was dropped for queue is full.")
+            case "reject":
+                try:
+                    self._queue.put_nowait(update)
+                except asyncio.QueueFull:
+                    # telegram will redeliver the update later.
+                    self.rejected += 1
+                    return web.Response(status=429)
+        return web.Response()
+
+    async def _work(self) -> None:
+        while True:
+            update = await self._queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update, **self._workflow_data)
+            except Exception:
+                logger.error(f"failed to process update {update.update_id}.")
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self, drop_pending_updates: bool = False) -> None:
+        app = web.Application()
+        app.router.add_post(self.config.path, self._handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+
+        loop = asyncio.get_running_loop()
+        with contextlib.suppress(NotImplementedError):
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(signum, self.stop)
+
+        await self.dispatcher.emit_startup(bot=self.bot, **self._workflow_data)
+        workers = [asyncio.create_task(self._work()) for _ in range(self.config.workers)]
+        try:
+            await web.TCPSite(runner, self.config.host, self.config.port).start()
+            await self.bot.set_webhook(
+                self.config.url,
+                allowed_updates=self.dispatcher.resolve_used_update_types(),
+                drop_pending_updates=drop_pending_updates,
+                secret_token=self.config.secret_token,
+            )
+            logger.info(f"webhook is listening on {self.config.host}:{self.config.port}.")
+            await self._stop.wait()
+        finally:
+            await runner.cleanup()
+            # updates were acknowledged, so try to finish them before exiting.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._queue.join(), self.config.shutdown_timeout.total_seconds()
+                )
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self.dispatcher.emit_shutdown(bot=self.bot, **self._workflow_data)
+            await self.bot.session.close()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from yakusoku.database import SQLSessionManager
+
+_cwd = os.getcwd()
+_workspace = tempfile.TemporaryDirectory(prefix="yakusoku-test-")
+
+
+def pytest_configure() -> None:
+    # data and config are created in the working directory on import, so tests run in a scratch
+    # one, which is entered before any test module is collected.
+    config_path = Path(_workspace.name) / "config"
+    config_path.mkdir()
+    # json is valid yaml.
+    (config_path / "bot.yaml").write_text('{"token": "1000000:test", "owner": 1}')
+    os.chdir(_workspace.name)
+
+
+def pytest_unconfigure() -> None:
+    os.chdir(_cwd)
+    _workspace.cleanup()
+
+
+class FakeClock:
+    now: float
+
+    def __init__(self) -> None:
+        self.now = 1000
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def sql(tmp_path: Path) -> SQLSessionManager:
+    # tables are created and the engine is closed by tests, on their own event loop.
+    return SQLSessionManager(str(tmp_path / "data.db"))
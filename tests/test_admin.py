@@ -0,0 +1,79 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+
+from tests.conftest import FakeClock
+from yakusoku.archive import admin
+from yakusoku.archive.admin import AdminManager
+
+
+class FakeBot:
+    admins: dict[int, list[int]]
+    requests: int
+
+    def __init__(self, admins: dict[int, list[int]]) -> None:
+        self.admins = admins
+        self.requests = 0
+
+    async def get_chat_administrators(self, chat: int) -> list[Any]:
+        self.requests += 1
+        await asyncio.sleep(0)
+        return [SimpleNamespace(user=SimpleNamespace(id=id)) for id in self.admins[chat]]
+
+
+@pytest.fixture
+def manager(clock: FakeClock, monkeypatch: pytest.MonkeyPatch) -> AdminManager:
+    monkeypatch.setattr(admin, "time", clock)
+    return AdminManager(timedelta(minutes=1))
+
+
+def test_concurrent_checks_share_a_request(manager: AdminManager) -> None:
+    fake = FakeBot({-1: [1, 2]})
+    bot: Bot = fake  # type: ignore
+
+    async def main() -> None:
+        results = await asyncio.gather(*(manager.is_admin(bot, -1, 1) for _ in range(5)))
+        assert all(results)
+        assert not await manager.is_admin(bot, -1, 3)
+        assert fake.requests == 1
+
+    asyncio.run(main())
+
+
+def test_expired_chats_are_evicted(manager: AdminManager, clock: FakeClock) -> None:
+    fake = FakeBot({-1: [1], -2: [2]})
+    bot: Bot = fake  # type: ignore
+
+    async def main() -> None:
+        await manager.get_admins(bot, -1)
+        clock.advance(30)
+        await manager.get_admins(bot, -2)
+        clock.advance(31)
+        # the first chat expired, while the second is still cached.
+        assert await manager.get_admins(bot, -2) == {2}
+        assert list(manager._admins) == [-2]  # pyright: ignore[reportPrivateUsage]
+        fake.admins[-1] = [3]
+        assert await manager.get_admins(bot, -1) == {3}
+        assert fake.requests == 3
+
+    asyncio.run(main())
+
+
+def test_member_updates_do_not_change_returned_sets(manager: AdminManager) -> None:
+    bot: Bot = FakeBot({-1: [1]})  # type: ignore
+
+    async def main() -> None:
+        admins = await manager.get_admins(bot, -1)
+        manager.update_member(-1, 2, ChatMemberStatus.ADMINISTRATOR)
+        manager.update_member(-1, 1, ChatMemberStatus.MEMBER)
+        assert admins == {1}
+        assert await manager.get_admins(bot, -1) == {2}
+        manager.remove_chat(-1)
+        assert await manager.get_admins(bot, -1) == {1}
+
+    asyncio.run(main())
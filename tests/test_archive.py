@@ -0,0 +1,112 @@
+import asyncio
+from datetime import timedelta
+from typing import Callable
+
+from aiogram.types import Chat
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from yakusoku.archive.buffer import ArchiveBuffer
+from yakusoku.archive.group import GroupManager
+from yakusoku.database import SQLSessionManager
+
+
+def test_membership(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        groups = GroupManager(sql)
+        for member in (1, 2, 3):
+            await groups.add_member(-1, member)
+        await groups.add_member(-2, 1)
+        # adding an existing member changes nothing.
+        revision = groups.members_revision(-1)
+        await groups.add_member(-1, 1)
+        assert groups.members_revision(-1) == revision
+
+        assert sorted(await groups.get_members(-1)) == [1, 2, 3]
+        assert await groups.is_member(-1, 2)
+        assert not await groups.is_member(-2, 2)
+
+        await groups.remove_members(-1, [2, 3])
+        assert await groups.get_members(-1) == [1]
+        assert groups.members_revision(-1) > revision
+        await groups.remove_member_from_all(1)
+        assert not await groups.get_members(-1)
+        assert not await groups.get_members(-2)
+        await sql.close()
+
+    asyncio.run(main())
+
+
+def test_deferred_writes_are_flushed_in_batch(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        buffer = ArchiveBuffer(sql, timedelta(minutes=1), 100)
+        groups = GroupManager(sql, buffer)
+        for title in ("first", "second"):
+            await groups.update_group_from_chat(
+                Chat(id=-1, type="supergroup", title=title), deferred=True
+            )
+        for member in (1, 2):
+            await groups.add_member(-1, member, deferred=True)
+        assert buffer.pending == 4
+        # pending data is read before it is written.
+        assert (await groups.get_group(-1)).name == "second"
+        assert sorted(await groups.get_members(-1)) == [1, 2]
+
+        await buffer.flush()
+        assert not buffer.pending
+        assert [group.name for group in await GroupManager(sql).get_groups()] == ["second"]
+        assert sorted(await GroupManager(sql).get_members(-1)) == [1, 2]
+        await sql.close()
+
+    asyncio.run(main())
+
+
+def test_removal_waits_for_a_flush(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        buffer = ArchiveBuffer(sql, timedelta(minutes=1), 100)
+        groups = GroupManager(sql, buffer)
+        flushing, resume = asyncio.Event(), asyncio.Event()
+
+        async def slow_flush(_: AsyncSession) -> Callable[[], None]:
+            flushing.set()
+            await resume.wait()
+            return lambda: None
+
+        buffer.register(slow_flush)
+        await groups.add_member(-1, 1, deferred=True)
+        flush = asyncio.create_task(buffer.flush())
+        await flushing.wait()
+        remove = asyncio.create_task(groups.remove_member(-1, 1))
+        await asyncio.sleep(0.01)
+        assert not remove.done()
+        resume.set()
+        await asyncio.gather(flush, remove)
+        # the member written by the flush is not brought back.
+        assert not await groups.is_member(-1, 1)
+        await sql.close()
+
+    asyncio.run(main())
+
+
+def test_threshold_wakes_the_flusher(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        buffer = ArchiveBuffer(sql, timedelta(minutes=1), 2)
+        groups = GroupManager(sql, buffer)
+        buffer.start()
+        await groups.add_member(-1, 1, deferred=True)
+        await asyncio.sleep(0.05)
+        assert buffer.pending == 1
+        await groups.add_member(-1, 2, deferred=True)
+        for _ in range(100):
+            if not buffer.pending:
+                break
+            await asyncio.sleep(0.01)
+        assert sorted(await GroupManager(sql).get_members(-1)) == [1, 2]
+        await buffer.close()
+        await sql.close()
+
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+import pytest
+
+from tests.conftest import FakeClock
+from yakusoku import breaker
+from yakusoku.breaker import CircuitBreaker, CircuitState
+
+
+@pytest.fixture
+def circuit(clock: FakeClock, monkeypatch: pytest.MonkeyPatch) -> CircuitBreaker:
+    monkeypatch.setattr(breaker, "time", clock)
+    return CircuitBreaker("upstream", failure_threshold=3, recovery_timeout=10)
+
+
+def test_opens_after_threshold(circuit: CircuitBreaker) -> None:
+    for _ in range(2):
+        assert circuit.allow()
+        circuit.record_failure()
+    assert circuit.state == CircuitState.CLOSED
+    circuit.record_failure()
+    assert circuit.state == CircuitState.OPEN
+    assert circuit.retry_after == 10
+    assert not circuit.allow()
+    assert circuit.rejected == 1
+
+
+def test_success_resets_failures(circuit: CircuitBreaker) -> None:
+    circuit.record_failure()
+    circuit.record_failure()
+    circuit.record_success(0.1)
+    circuit.record_failure()
+    assert circuit.state == CircuitState.CLOSED
+    assert circuit.failures == 1
+
+
+def test_half_open_admits_a_single_probe(circuit: CircuitBreaker, clock: FakeClock) -> None:
+    for _ in range(3):
+        circuit.record_failure()
+    clock.advance(10)
+    assert circuit.allow()
+    assert circuit.state == CircuitState.HALF_OPEN
+    assert not circuit.allow()
+    circuit.record_success(0.1)
+    assert circuit.state == CircuitState.CLOSED
+    assert circuit.allow()
+
+
+def test_failed_probe_reopens(circuit: CircuitBreaker, clock: FakeClock) -> None:
+    for _ in range(3):
+        circuit.record_failure()
+    clock.advance(10)
+    assert circuit.allow()
+    circuit.record_failure()
+    assert circuit.state == CircuitState.OPEN
+    assert circuit.retry_after == 10
+    assert not circuit.allow()
+
+
+def test_released_probe_lets_the_next_one_through(
+    circuit: CircuitBreaker, clock: FakeClock
+) -> None:
+    for _ in range(3):
+        circuit.record_failure()
+    clock.advance(10)
+    assert circuit.allow()
+    circuit.release()
+    assert circuit.state == CircuitState.HALF_OPEN
+    assert circuit.allow()
+    assert not circuit.allow()
+
+
+def test_percentile_needs_enough_samples(circuit: CircuitBreaker) -> None:
+    for latency in range(15):
+        circuit.record_success(latency)
+    assert circuit.percentile(0.5) is None
+    circuit.record_success(15)
+    assert circuit.percentile(0.5) == 8
+    assert circuit.percentile(1) == 15
@@ -0,0 +1,129 @@
+import asyncio
+import contextlib
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator
+
+import pytest
+from aiogram.types import Chat
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from tests.conftest import FakeClock
+from yakusoku.archive.buffer import ArchiveBuffer
+from yakusoku.archive.group import GroupManager
+from yakusoku.archive.models import GroupData
+from yakusoku.database import SQLSessionManager
+from yakusoku.utils import cache
+from yakusoku.utils.cache import LRUCache
+
+
+@pytest.fixture
+def lru(clock: FakeClock, monkeypatch: pytest.MonkeyPatch) -> LRUCache[str]:
+    monkeypatch.setattr(cache, "time", clock)
+    return LRUCache(2, timedelta(seconds=10))
+
+
+def test_least_recently_used_is_evicted(lru: LRUCache[str]) -> None:
+    lru.set(1, "a")
+    lru.set(2, "b")
+    assert lru.get(1) == "a"
+    lru.set(3, "c")
+    assert lru.get(2) is None
+    assert lru.get(1) == "a"
+    assert lru.get(3) == "c"
+    assert (lru.hits, lru.misses) == (3, 1)
+
+
+def test_expired_entry_is_dropped(lru: LRUCache[str], clock: FakeClock) -> None:
+    lru.set(1, "a")
+    clock.advance(10)
+    assert lru.get(1) == "a"
+    clock.advance(1)
+    assert lru.get(1) is None
+    assert not len(lru)
+
+
+def test_load_across_a_pop_is_not_cached(lru: LRUCache[str]) -> None:
+    with lru.loading(1) as remember:
+        lru.pop(1)
+        remember("stale")
+    assert lru.get(1) is None
+    with lru.loading(1) as remember:
+        remember("fresh")
+    assert lru.get(1) == "fresh"
+
+
+def test_overlapping_loads(lru: LRUCache[str]) -> None:
+    with lru.loading(1) as stale:
+        lru.pop(1)
+        with lru.loading(1) as fresh:
+            fresh("fresh")
+        stale("stale")
+    assert lru.get(1) == "fresh"
+
+
+def test_cache_is_disabled_without_size() -> None:
+    disabled = LRUCache[str](0, timedelta(seconds=10))
+    disabled.set(1, "a")
+    assert disabled.get(1) is None
+
+
+def test_group_is_invalidated_after_flush(sql: SQLSessionManager) -> None:
+    def make_chat(title: str) -> Chat:
+        return Chat(id=-1, type="supergroup", title=title)
+
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        buffer = ArchiveBuffer(sql, timedelta(minutes=1), 100)
+        groups = GroupManager(sql, buffer, 16, timedelta(minutes=1))
+        await groups.update_group(GroupData.from_chat(make_chat("old")))
+        assert (await groups.get_group(-1)).name == "old"
+        assert groups.cache.get(-1)
+
+        await groups.update_group_from_chat(make_chat("new"), deferred=True)
+        # the pending data is read before the cached one.
+        assert (await groups.get_group(-1)).name == "new"
+        await buffer.flush()
+        assert groups.cache.get(-1) is None
+        assert (await groups.get_group(-1)).name == "new"
+        await sql.close()
+
+    asyncio.run(main())
+
+
+def test_group_read_across_an_update_is_not_cached(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        groups = GroupManager(sql, None, 16, timedelta(minutes=1))
+        await groups.update_group(GroupData(id=-1, name="old", username=None))
+        loaded, resume = asyncio.Event(), asyncio.Event()
+
+        @contextlib.asynccontextmanager
+        async def gated_session() -> AsyncGenerator[AsyncSession, None]:
+            # the query completes, then the update is committed before the read goes on.
+            async with sql.session() as session:
+                execute = session.execute
+
+                async def execute_then_wait(*args: Any, **kwargs: Any) -> Any:
+                    result = await execute(*args, **kwargs)
+                    loaded.set()
+                    await resume.wait()
+                    return result
+
+                session.execute = execute_then_wait
+                yield session
+
+        groups.sql = SimpleNamespace(session=gated_session)  # type: ignore
+        task = asyncio.create_task(groups.get_group(-1))
+        await loaded.wait()
+        groups.sql = sql
+        await groups.update_group(GroupData(id=-1, name="new", username=None))
+        resume.set()
+
+        assert (await task).name == "old"
+        assert groups.cache.get(-1) is None
+        assert (await groups.get_group(-1)).name == "new"
+        await sql.close()
+
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from email.utils import formatdate
+
+import pytest
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tests.conftest import FakeClock
+from yakusoku import httpcache
+from yakusoku.httpcache import _freshness  # pyright: ignore[reportPrivateUsage]
+
+
+def make_headers(headers: dict[str, str] | None = None) -> CIMultiDictProxy[str]:
+    return CIMultiDictProxy(CIMultiDict(headers or {}))
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({}, 0),
+        ({"Cache-Control": "max-age=60"}, 60),
+        ({"Cache-Control": "public, max-age=60", "Age": "15"}, 45),
+        ({"Cache-Control": "max-age=60", "Age": "90"}, 0),
+        # s-maxage is for shared caches, and the bot is shared by everyone.
+        ({"Cache-Control": "max-age=60, s-maxage=300"}, 300),
+        ({"Cache-Control": 'max-age="60"'}, 60),
+        ({"Cache-Control": "max-age=soon"}, 0),
+        ({"Cache-Control": "no-cache, max-age=60"}, 0),
+        ({"Cache-Control": "No-Store"}, None),
+        ({"Cache-Control": "no-store, max-age=60"}, None),
+    ],
+)
+def test_cache_control(headers: dict[str, str], expected: float | None) -> None:
+    assert _freshness(make_headers(headers), None) == expected
+
+
+def test_ttl_overrides_all_but_no_store() -> None:
+    ttl = timedelta(minutes=5)
+    assert _freshness(make_headers(), ttl) == 300
+    assert _freshness(make_headers({"Cache-Control": "no-cache, max-age=60"}), ttl) == 300
+    assert _freshness(make_headers({"Cache-Control": "no-store"}), ttl) is None
+
+
+def test_expires(clock: FakeClock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(httpcache, "time", clock)
+    expires = formatdate(clock.now + 120, usegmt=True)
+    assert _freshness(make_headers({"Expires": expires}), None) == 120
+    expired = formatdate(clock.now - 120, usegmt=True)
+    assert _freshness(make_headers({"Expires": expired}), None) == 0
+    # an invalid date means it is already expired.
+    assert _freshness(make_headers({"Expires": "0"}), None) == 0
+    # max-age takes precedence over expires.
+    headers = make_headers({"Cache-Control": "max-age=60", "Expires": expires})
+    assert _freshness(headers, None) == 60
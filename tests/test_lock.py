@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+import pytest
+
+from tests.conftest import FakeClock
+from yakusoku.utils import lock
+from yakusoku.utils.lock import LeaseLockManager
+
+
+@pytest.fixture
+def locks(clock: FakeClock, monkeypatch: pytest.MonkeyPatch) -> LeaseLockManager:
+    monkeypatch.setattr(lock, "time", clock)
+    return LeaseLockManager(timedelta(seconds=10))
+
+
+def test_lock_is_exclusive_until_unlocked(locks: LeaseLockManager) -> None:
+    token = locks.lock("key")
+    assert token
+    assert locks.lock("key") is None
+    assert locks.unlock("key", token)
+    assert not locks.unlock("key", token)
+    assert locks.lock("key")
+    assert (locks.acquired, locks.contended) == (2, 1)
+
+
+def test_lease_expires(locks: LeaseLockManager, clock: FakeClock) -> None:
+    assert locks.lock("key")
+    clock.advance(10)
+    assert locks.lock("key", ttl=timedelta(seconds=30))
+    assert locks.expired == 1
+    clock.advance(20)
+    assert locks.lock("key") is None
+
+
+def test_stale_token_cannot_unlock(locks: LeaseLockManager, clock: FakeClock) -> None:
+    stale = locks.lock_all("first", "second")
+    assert stale
+    clock.advance(10)
+    current = locks.lock("first")
+    assert current
+    assert not locks.unlock("first", stale)
+    locks.unlock_all_unchecked("first", "second", token=stale)
+    # only the lease still held with the stale token is released.
+    assert locks.lock("first") is None
+    assert locks.lock("second")
+    assert locks.unlock("first", current)
+
+
+def test_lock_all_takes_none_on_contention(locks: LeaseLockManager) -> None:
+    assert locks.lock("second")
+    assert locks.lock_all("first", "second") is None
+    assert locks.lock("first")
+
+
+def test_expired_leases_are_swept(locks: LeaseLockManager, clock: FakeClock) -> None:
+    for key in range(64):
+        locks.lock(key)
+    clock.advance(10)
+    locks.lock("key")
+    assert len(locks) == 1
+    assert locks.expired == 64
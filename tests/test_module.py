@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Update
+
+from yakusoku import context
+from yakusoku.module import ModuleManager
+
+_CONFIG = """\
+from yakusoku.module import ModuleConfig
+
+__module_config__ = ModuleConfig(
+    name="sample", description="sample module", commands={"sample": "sample"}, lazy=True
+)
+"""
+
+_MAIN = """\
+import threading
+
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from yakusoku.context import module_manager
+
+thread = threading.current_thread()
+handled: list[str | None] = []
+router = module_manager.create_router()
+
+
+@router.message(Command("sample"))
+async def sample(message: Message) -> None:
+    handled.append(message.text)
+"""
+
+
+@pytest.fixture
+def sample(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    package = tmp_path / "lazy_sample"
+    package.mkdir()
+    (package / "__init__.py").write_text(_CONFIG)
+    (package / "main.py").write_text(_MAIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package.name
+    for name in [package.name, f"{package.name}.main"]:
+        sys.modules.pop(name, None)
+
+
+def make_manager(monkeypatch: pytest.MonkeyPatch) -> tuple[ModuleManager, Dispatcher]:
+    dispatcher = Dispatcher()
+    manager = ModuleManager(dispatcher, lazy=True)
+    monkeypatch.setattr(context, "module_manager", manager, raising=False)
+    return manager, dispatcher
+
+
+def test_lazy_module_takes_the_place_of_its_placeholder(
+    sample: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    manager, dispatcher = make_manager(monkeypatch)
+    before = dispatcher.include_router(Router(name="before"))
+    manager.import_modules(sample)
+    after = dispatcher.include_router(Router(name="after"))
+    assert manager.loaded_modules["sample"].main is None
+    assert f"{sample}.main" not in sys.modules
+
+    async def main() -> None:
+        await manager.load_lazy_module(sample)
+
+    asyncio.run(main())
+    module = sys.modules[f"{sample}.main"]
+    assert manager.loaded_modules["sample"].main is module
+    # the import ran in a worker thread, while the router is attached in order.
+    assert module.thread is not threading.current_thread()
+    assert dispatcher.sub_routers == [before, module.router, after]
+    assert module.router.parent_router is dispatcher
+    assert manager.get_owner(module.router) is manager.loaded_modules["sample"].config
+    assert manager.get_owner(before) is None
+
+
+def test_lazy_module_is_imported_on_its_command(
+    sample: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    manager, dispatcher = make_manager(monkeypatch)
+    manager.import_modules(sample)
+    update = Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "text": "/sample",
+                "entities": [{"type": "bot_command", "offset": 0, "length": 7}],
+            },
+        }
+    )
+
+    async def main() -> None:
+        bot = Bot("1000000:test")
+        await dispatcher.feed_update(bot, update)
+        await bot.session.close()
+
+    asyncio.run(main())
+    assert sys.modules[f"{sample}.main"].handled == ["/sample"]
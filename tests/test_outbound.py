@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import FakeClock
+from yakusoku import outbound
+from yakusoku.configs import RateLimitConfig
+from yakusoku.outbound import OutboundMiddleware, TokenBucket
+
+
+@pytest.fixture
+def bucket(clock: FakeClock, monkeypatch: pytest.MonkeyPatch) -> TokenBucket:
+    monkeypatch.setattr(outbound, "time", clock)
+    return TokenBucket(rate=2, burst=4)
+
+
+def test_refills_by_rate_up_to_burst(bucket: TokenBucket, clock: FakeClock) -> None:
+    async def main() -> None:
+        for _ in range(4):
+            await bucket.acquire(0)
+        assert bucket.tokens == 0
+        assert not bucket.idle
+        clock.advance(1)
+        assert not bucket.idle
+        assert bucket.tokens == 2
+        clock.advance(60)
+        assert bucket.idle
+        assert bucket.tokens == 4
+
+    asyncio.run(main())
+
+
+def test_block_keeps_bucket_empty(bucket: TokenBucket, clock: FakeClock) -> None:
+    async def main() -> None:
+        bucket.block(3)
+        assert bucket.tokens == -6
+        clock.advance(3)
+        assert not bucket.idle
+        assert bucket.tokens == 0
+        clock.advance(2)
+        assert bucket.idle
+
+    asyncio.run(main())
+
+
+def test_waiters_are_served_by_priority() -> None:
+    served: list[str] = []
+
+    async def acquire(bucket: TokenBucket, name: str, priority: int) -> None:
+        await bucket.acquire(priority)
+        served.append(name)
+
+    async def main() -> None:
+        # real time is used, for the waiters are woken by the loop.
+        bucket = TokenBucket(rate=100, burst=1)
+        await bucket.acquire(0)
+        tasks = [
+            asyncio.create_task(acquire(bucket, "passive", 1)),
+            asyncio.create_task(acquire(bucket, "action", 2)),
+            asyncio.create_task(acquire(bucket, "command", 0)),
+        ]
+        await asyncio.wait_for(asyncio.gather(*tasks), 1)
+        assert served == ["command", "passive", "action"]
+
+    asyncio.run(main())
+
+
+def test_idle_buckets_are_pruned_amortized(
+    clock: FakeClock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(outbound, "time", clock)
+    monkeypatch.setattr(outbound, "_MAX_IDLE_BUCKETS", 4)
+
+    async def main() -> None:
+        middleware = OutboundMiddleware(RateLimitConfig())
+        get_bucket = middleware._get_chat_bucket  # pyright: ignore[reportPrivateUsage]
+
+        def buckets() -> list[int | str]:
+            return list(middleware._chats)  # pyright: ignore[reportPrivateUsage]
+
+        for chat in range(1, 6):
+            await get_bucket(chat).acquire(0)
+        # all of them are busy, so the next pruning waits for twice as many.
+        assert buckets() == [1, 2, 3, 4, 5]
+        clock.advance(60)
+        for chat in range(6, 9):
+            get_bucket(chat)
+        assert len(buckets()) == 8
+        get_bucket(9)
+        assert buckets() == [9]
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import re
+from datetime import datetime
+
+import pytest
+from aiogram.types import Chat, Message, MessageEntity
+
+from yakusoku import prefilter
+from yakusoku.prefilter import classify, register_pattern
+
+
+def make_message(
+    text: str | None = None,
+    caption: str | None = None,
+    entities: list[MessageEntity] | None = None,
+) -> Message:
+    return Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=1, type="private"),
+        text=text,
+        caption=caption,
+        entities=entities if text else None,
+        caption_entities=entities if caption else None,
+    )
+
+
+@pytest.mark.parametrize(
+    ("text", "command", "mention", "slash"),
+    [
+        ("hello", None, None, False),
+        ("/start", "start", None, False),
+        ("/start@yakusoku_bot arguments", "start", "yakusoku_bot", False),
+        ("/摸摸", "摸摸", None, True),
+        ("/摸摸 @someone", "摸摸", None, True),
+        ("//start", "/start", None, True),
+        ("/$ 1 + 1", "$", None, True),
+        ("/摸摸\nsecond line", "摸摸", None, False),
+    ],
+)
+def test_command_and_slash(
+    text: str, command: str | None, mention: str | None, slash: bool
+) -> None:
+    traits = classify(make_message(text))
+    assert traits.command == command
+    assert traits.mention == mention
+    assert traits.slash == slash
+    assert traits.has("command") == (command is not None)
+    assert traits.has("slash") == slash
+
+
+def test_caption_is_never_slash() -> None:
+    traits = classify(make_message(caption="/摸摸"))
+    assert traits.command == "摸摸"
+    assert not traits.slash
+
+
+def test_no_text() -> None:
+    traits = classify(make_message())
+    assert traits.command is None
+    assert not traits.slash
+    assert not traits.url
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        make_message("see https://example.com"),
+        make_message("see www.example.com"),
+        make_message("example.com", entities=[MessageEntity(type="url", offset=0, length=11)]),
+        make_message(
+            "here",
+            entities=[MessageEntity(type="text_link", offset=0, length=4, url="https://a.b")],
+        ),
+        make_message(
+            caption="here",
+            entities=[MessageEntity(type="text_link", offset=0, length=4, url="https://a.b")],
+        ),
+    ],
+)
+def test_url(message: Message) -> None:
+    assert classify(message).url
+
+
+def test_no_url() -> None:
+    assert not classify(make_message("example.com")).url
+
+
+def test_pattern_matching_a_link(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(prefilter, "_patterns", {})
+    monkeypatch.setattr(prefilter, "_scanner", None)
+    register_pattern("artwork", re.compile(r"https?://(?:www\.)?pixiv\.net/artworks/(\d+)", re.I))
+    # the link is a url as well, which must not hide it from the pattern.
+    traits = classify(make_message("see https://www.pixiv.net/artworks/1"))
+    assert traits.url
+    assert traits.matches == {"artwork": ["https://www.pixiv.net/artworks/1"]}
+    assert traits.has("artwork")
+    assert not classify(make_message("see https://example.com")).has("artwork")
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import timedelta
+
+from yakusoku.utils.scheduler import ExpiryScheduler
+
+
+def test_callbacks_run_in_order_of_expiry() -> None:
+    called: list[str] = []
+
+    def record(name: str):
+        async def callback() -> None:
+            called.append(name)
+
+        return callback
+
+    async def main() -> None:
+        scheduler = ExpiryScheduler()
+        scheduler.schedule(timedelta(milliseconds=30), record("late"))
+        scheduler.schedule(timedelta(milliseconds=10), record("early"))
+        await asyncio.sleep(0.1)
+        assert called == ["early", "late"]
+        assert scheduler.pending == 0
+
+    asyncio.run(main())
+
+
+def test_earlier_entry_wakes_the_runner() -> None:
+    called: list[str] = []
+
+    async def callback() -> None:
+        called.append("soon")
+
+    async def main() -> None:
+        scheduler = ExpiryScheduler()
+        scheduler.schedule(timedelta(hours=1), callback)
+        await asyncio.sleep(0)
+        scheduler.schedule(timedelta(milliseconds=10), callback)
+        await asyncio.sleep(0.1)
+        assert called == ["soon"]
+        assert scheduler.pending == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_entry_is_skipped_lazily() -> None:
+    called: list[str] = []
+
+    async def callback() -> None:
+        called.append("cancelled")
+
+    async def main() -> None:
+        scheduler = ExpiryScheduler()
+        handle = scheduler.schedule(timedelta(milliseconds=10), callback)
+        handle.cancel()
+        # cancelling twice is a no-op.
+        handle.cancel()
+        assert scheduler.pending == 0
+        assert len(scheduler._heap) == 1  # pyright: ignore[reportPrivateUsage]
+        await asyncio.sleep(0.05)
+        assert not called
+        assert not scheduler._heap  # pyright: ignore[reportPrivateUsage]
+
+    asyncio.run(main())
+
+
+def test_heap_is_compacted_once_mostly_cancelled() -> None:
+    async def callback() -> None:
+        pass
+
+    async def main() -> None:
+        scheduler = ExpiryScheduler()
+        handles = [scheduler.schedule(timedelta(hours=1, seconds=i), callback) for i in range(100)]
+        heap = scheduler._heap  # pyright: ignore[reportPrivateUsage]
+        # half of them cancelled is not enough.
+        for handle in handles[:50]:
+            handle.cancel()
+        assert len(heap) == 100
+        handles[50].cancel()
+        heap = scheduler._heap  # pyright: ignore[reportPrivateUsage]
+        assert len(heap) == scheduler.pending == 49
+        assert all(not handle.cancelled for _, _, handle in heap)
+        assert heap[0][2] is handles[51]
+
+    asyncio.run(main())
+
+
+def test_small_heap_is_not_compacted() -> None:
+    async def callback() -> None:
+        pass
+
+    async def main() -> None:
+        scheduler = ExpiryScheduler()
+        handles = [scheduler.schedule(timedelta(hours=1), callback) for _ in range(10)]
+        for handle in handles[:9]:
+            handle.cancel()
+        assert len(scheduler._heap) == 10  # pyright: ignore[reportPrivateUsage]
+        assert scheduler.pending == 1
+
+    asyncio.run(main())
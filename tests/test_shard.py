@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any
+
+from aiogram.types import Chat, TelegramObject
+
+from yakusoku.configs import ShardConfig
+from yakusoku.shard import ShardedUpdateMiddleware
+
+
+def make_data(chat: int) -> dict[str, Any]:
+    return {"event_chat": Chat(id=chat, type="private")}
+
+
+def test_updates_of_a_chat_run_in_order() -> None:
+    shards = ShardedUpdateMiddleware(ShardConfig())
+    started: list[str] = []
+    release: dict[str, asyncio.Event] = {}
+
+    def make_handler(name: str):
+        release[name] = asyncio.Event()
+
+        async def handler(event: TelegramObject, data: dict[str, Any]) -> str:
+            started.append(name)
+            await release[name].wait()
+            return name
+
+        return handler
+
+    async def main() -> None:
+        first = asyncio.create_task(shards(make_handler("1a"), TelegramObject(), make_data(1)))
+        second = asyncio.create_task(shards(make_handler("1b"), TelegramObject(), make_data(1)))
+        other = asyncio.create_task(shards(make_handler("2a"), TelegramObject(), make_data(2)))
+        await asyncio.sleep(0)
+        # the other chat runs in parallel, while the same chat waits for the first update.
+        assert started == ["1a", "2a"]
+        assert (shards.pending, shards.peak, shards.active_chats) == (1, 1, 2)
+        release["2a"].set()
+        assert await other == "2a"
+        assert shards.active_chats == 1
+        release["1b"].set()
+        release["1a"].set()
+        assert await first == "1a"
+        assert await second == "1b"
+        assert started == ["1a", "2a", "1b"]
+        assert (shards.pending, shards.processed, shards.active_chats) == (0, 3, 0)
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_is_skipped() -> None:
+    shards = ShardedUpdateMiddleware(ShardConfig())
+    called: list[str] = []
+    release = asyncio.Event()
+
+    async def blocking(event: TelegramObject, data: dict[str, Any]) -> None:
+        called.append("blocking")
+        await release.wait()
+
+    async def cancelled(event: TelegramObject, data: dict[str, Any]) -> None:
+        called.append("cancelled")
+
+    async def main() -> None:
+        first = asyncio.create_task(shards(blocking, TelegramObject(), make_data(1)))
+        second = asyncio.create_task(shards(cancelled, TelegramObject(), make_data(1)))
+        await asyncio.sleep(0)
+        second.cancel()
+        await asyncio.sleep(0)
+        assert second.cancelled()
+        assert shards.pending == 0
+        release.set()
+        await first
+        assert called == ["blocking"]
+        assert shards.processed == 1
+        assert shards.active_chats == 0
+
+    asyncio.run(main())
+
+
+def test_disabled_or_keyless_updates_pass_through() -> None:
+    async def handler(event: TelegramObject, data: dict[str, Any]) -> int:
+        return 1
+
+    async def main() -> None:
+        disabled = ShardedUpdateMiddleware(ShardConfig(enabled=False))
+        assert await disabled(handler, TelegramObject(), make_data(1)) == 1
+        enabled = ShardedUpdateMiddleware(ShardConfig())
+        assert await enabled(handler, TelegramObject(), {}) == 1
+        assert disabled.processed == enabled.processed == 0
+
+    asyncio.run(main())
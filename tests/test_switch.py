@@ -0,0 +1,72 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from yakusoku.database import SQLSessionManager
+from yakusoku.dot.switch.manager import SwitchManager
+from yakusoku.dot.switch.models import SwitchConfig
+from yakusoku.module import ModuleConfig
+
+ENABLED = ModuleConfig(name="enabled", description="", commands={})
+DISABLED = ModuleConfig(name="disabled", description="", commands={}, default_enabled=False)
+
+
+def test_switches_are_cached_and_updated(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        switches = SwitchManager(sql)
+        configs = await switches.get_switch_configs(-1, [ENABLED, DISABLED])
+        assert [config.enabled for config in configs] == [True, False]
+
+        await switches.update_switch_config(SwitchConfig(group=-1, module="enabled", enabled=False))
+        assert not (await switches.get_switch_config(-1, ENABLED)).enabled
+        # a new manager reads what was written.
+        assert not (await SwitchManager(sql).get_switch_config(-1, ENABLED)).enabled
+        await sql.close()
+
+    asyncio.run(main())
+
+
+def test_load_across_an_update_is_discarded(sql: SQLSessionManager) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        switches = SwitchManager(sql)
+        loaded, resume = asyncio.Event(), asyncio.Event()
+        queries = 0
+
+        @contextlib.asynccontextmanager
+        async def gated_session() -> AsyncGenerator[AsyncSession, None]:
+            # the first query completes, then the update is committed before the load goes on.
+            async with sql.session() as session:
+                execute = session.execute
+
+                async def execute_then_wait(*args: Any, **kwargs: Any) -> Any:
+                    nonlocal queries
+                    queries += 1
+                    result = await execute(*args, **kwargs)
+                    if queries == 1:
+                        loaded.set()
+                        await resume.wait()
+                    return result
+
+                session.execute = execute_then_wait
+                yield session
+
+        switches.sql = SimpleNamespace(session=gated_session)  # type: ignore
+        task = asyncio.create_task(switches.get_switch_config(-1, ENABLED))
+        await loaded.wait()
+        await switches.update_switch_config(SwitchConfig(group=-1, module="enabled", enabled=False))
+        resume.set()
+
+        # the stale rows are queried again, after the query of the update.
+        assert not (await task).enabled
+        assert queries == 3
+        assert not (await switches.get_switch_config(-1, ENABLED)).enabled
+        assert queries == 3
+        await sql.close()
+
+    asyncio.run(main())
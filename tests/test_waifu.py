@@ -0,0 +1,104 @@
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+from sqlmodel import SQLModel
+
+from yakusoku.archive.models import GroupMemberData, UserData
+from yakusoku.database import SQLSessionManager
+from yakusoku.modules.waifu.manager import _WeightTable  # pyright: ignore[reportPrivateUsage]
+from yakusoku.modules.waifu.manager import (
+    MemberNotSufficientError,
+    NoChoosableWaifuError,
+    WaifuManager,
+)
+from yakusoku.modules.waifu.models import WaifuData
+
+
+def choose_all(table: _WeightTable, exclude: int, monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    # every point of the range is drawn once, so the counts are the weights exactly.
+    points = iter(range(1 << 16))
+
+    def randrange(stop: int) -> int:
+        return next(points)
+
+    monkeypatch.setattr(random, "randrange", randrange)
+    total = table.cum_weights[-1] - (
+        table.weights[table.indexes[exclude]] if exclude in table.indexes else 0
+    )
+    return [table.choose(exclude) for _ in range(total)]
+
+
+def test_create_builds_cumulative_weights() -> None:
+    table = _WeightTable.create(1, {10: 1, 20: 0, 30: 3})
+    assert table.members == [10, 20, 30]
+    assert table.cum_weights == [1, 1, 4]
+    assert table.indexes == {10: 0, 20: 1, 30: 2}
+
+
+def test_choose_follows_weights(monkeypatch: pytest.MonkeyPatch) -> None:
+    table = _WeightTable.create(1, {10: 1, 20: 0, 30: 3, 40: 2})
+    assert Counter(choose_all(table, 0, monkeypatch)) == {10: 1, 30: 3, 40: 2}
+
+
+@pytest.mark.parametrize("exclude", [10, 30, 40])
+def test_choose_skips_excluded(exclude: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    weights = {10: 1, 20: 0, 30: 3, 40: 2}
+    table = _WeightTable.create(1, weights)
+    expected = {
+        member: weight for member, weight in weights.items() if weight and member != exclude
+    }
+    assert Counter(choose_all(table, exclude, monkeypatch)) == expected
+
+
+def test_choose_without_others() -> None:
+    with pytest.raises(MemberNotSufficientError):
+        _WeightTable.create(1, {}).choose(10)
+    with pytest.raises(MemberNotSufficientError):
+        _WeightTable.create(1, {10: 1}).choose(10)
+    with pytest.raises(NoChoosableWaifuError):
+        _WeightTable.create(1, {10: 1, 20: 0}).choose(10)
+
+
+def test_weights_loaded_across_a_write_are_dropped(
+    sql: SQLSessionManager, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def main() -> None:
+        await sql.init_db(SQLModel.metadata)
+        async with sql.session() as session:
+            for member in (1, 2, 3):
+                session.add(UserData(id=member, name=str(member)))
+                session.add(GroupMemberData(group=-1, member=member))
+            await session.commit()
+
+        manager = WaifuManager(sql)
+        load = manager._load_weights  # pyright: ignore[reportPrivateUsage]
+        loaded, resume = asyncio.Event(), asyncio.Event()
+        loads = 0
+
+        async def load_weights(group: int) -> _WeightTable:
+            nonlocal loads
+            loads += 1
+            table = await load(group)
+            # the first load reads the rows before the marriage is written.
+            if loads == 1:
+                loaded.set()
+                await resume.wait()
+            return table
+
+        monkeypatch.setattr(manager, "_load_weights", load_weights)
+        task = asyncio.create_task(manager._get_weights(-1))  # pyright: ignore[reportPrivateUsage]
+        await loaded.wait()
+        data = WaifuData(group=-1, member=2)
+        data.set_partner(3)
+        await manager.update_waifu_data(data)
+        resume.set()
+
+        table = await task
+        assert loads == 2
+        assert table.weights[table.indexes[2]] == 0
+        assert manager._weights[-1] is table  # pyright: ignore[reportPrivateUsage]
+        await sql.close()
+
+    asyncio.run(main())
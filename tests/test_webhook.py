@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, Literal
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from yakusoku.configs import WebhookConfig
+from yakusoku.webhook import WebhookServer
+
+
+def make_update(id: int) -> dict[str, Any]:
+    return {
+        "update_id": id,
+        "message": {
+            "message_id": id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "text": f"message {id}",
+        },
+    }
+
+
+def make_server(
+    queue_size: int = 16, backpressure: Literal["block", "drop", "reject"] = "block"
+) -> tuple[WebhookServer, Dispatcher]:
+    config = WebhookConfig(
+        url="https://example.com/webhook",
+        secret_token="secret",
+        queue_size=queue_size,
+        backpressure=backpressure,
+    )
+    dispatcher = Dispatcher()
+    return WebhookServer(dispatcher, Bot("1000000:test"), config), dispatcher
+
+
+async def post(server: WebhookServer, *updates: int, token: str | None = "secret") -> list[int]:
+    app = web.Application()
+    app.router.add_post("/webhook", server._handle)  # pyright: ignore[reportPrivateUsage]
+    headers = {"X-Telegram-Bot-Api-Secret-Token": token} if token else {}
+    async with TestClient(TestServer(app)) as client:
+        statuses: list[int] = []
+        for update in updates:
+            response = await client.post("/webhook", json=make_update(update), headers=headers)
+            statuses.append(response.status)
+        return statuses
+
+
+def test_secret_token_is_required() -> None:
+    server, _ = make_server()
+
+    async def main() -> None:
+        assert await post(server, 1, token=None) == [401]
+        assert await post(server, 2, token="wrong") == [401]
+        assert await post(server, 3) == [200]
+        assert server.pending == 1
+        await server.bot.session.close()
+
+    asyncio.run(main())
+
+
+def test_full_queue_drops_or_rejects() -> None:
+    dropping, _ = make_server(2, "drop")
+    rejecting, _ = make_server(2, "reject")
+
+    async def main() -> None:
+        assert await post(dropping, 1, 2, 3) == [200, 200, 200]
+        assert (dropping.pending, dropping.dropped) == (2, 1)
+        assert await post(rejecting, 1, 2, 3) == [200, 200, 429]
+        assert (rejecting.pending, rejecting.rejected) == (2, 1)
+        await dropping.bot.session.close()
+        await rejecting.bot.session.close()
+
+    asyncio.run(main())
+
+
+def test_workers_feed_queued_updates() -> None:
+    server, dispatcher = make_server()
+    handled: list[str | None] = []
+
+    @dispatcher.message()
+    async def handle(message: Message) -> None:
+        handled.append(message.text)
+
+    async def main() -> None:
+        assert await post(server, 1, 2) == [200, 200]
+        worker = asyncio.create_task(server._work())  # pyright: ignore[reportPrivateUsage]
+        await asyncio.wait_for(server._queue.join(), 1)  # pyright: ignore[reportPrivateUsage]
+        worker.cancel()
+        assert handled == ["message 1", "message 2"]
+        await server.bot.session.close()
+
+    asyncio.run(main())